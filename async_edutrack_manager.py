@@ -0,0 +1,695 @@
+# async_edutrack_manager.py
+"""Asyncio EduTrack manager built on pymongo's AsyncMongoClient.
+
+Mirrors the CRUD, attendance, exam and result API of EduTrackManager for
+callers that run an event loop (web front ends, bulk jobs). Methods return
+data only; failures are logged to the "edutrack" logger and reported with the
+same None / [] / False return values as the sync manager.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+
+from bson import ObjectId
+
+from edutrack_cache import AsyncIdentifierResolver
+from edutrack_connection import connection_settings
+from edutrack_manager import (DEFAULT_GRADE_SCALE, INDEX_SPECS, LIST_PROJECTIONS, RESULT_STAT_SCOPES, EduTrackManager,
+                              _check_index, _chunked, _index_entry)
+
+
+logger = logging.getLogger("edutrack")
+
+
+class AsyncEduTrackManager:
+    """Async manager for EduTrack data stored in MongoDB."""
+
+    def __init__(self, grade_scale=None, client=None):
+        """Set up the manager; the client connects on the first query.
+
+        Pass client to share one AsyncMongoClient between managers running
+        on the same event loop.
+        """
+        self.grade_scale = grade_scale or DEFAULT_GRADE_SCALE
+        if client is None:
+            from pymongo import AsyncMongoClient
+            connection_string, options = connection_settings()
+            client = AsyncMongoClient(connection_string, **options)
+            self._owns_client = True
+        else:
+            self._owns_client = False
+        self.client = client
+        self.db = client.edutrack
+        self.resolver = AsyncIdentifierResolver(self.db)
+
+    async def close(self):
+        """Close the client if this manager created it."""
+        if self._owns_client and self.client is not None:
+            await self.client.close()
+        self.client = None
+
+    async def ensure_indexes(self):
+        """Create any missing indexes from INDEX_SPECS; returns the same report as the sync manager."""
+        report = []
+        existing = {}
+        for coll_name, keys, options in INDEX_SPECS:
+            entry = _index_entry(coll_name, keys, options)
+            try:
+                if coll_name not in existing:
+                    existing[coll_name] = await self.db[coll_name].index_information()
+                if not _check_index(entry, existing[coll_name]):
+                    await self.db[coll_name].create_index(keys, name=entry["index"], **options)
+                    entry["status"] = "created"
+            except Exception as e:
+                entry["status"] = "failed"
+                entry["error"] = str(e)
+            report.append(entry)
+        return report
+
+    # Generic helpers
+
+    async def _insert(self, collection, document, label):
+        try:
+            result = await collection.insert_one(document)
+            return str(result.inserted_id)
+        except Exception as e:
+            logger.warning("Error adding %s: %s", label, e)
+            return None
+
+    async def _list(self, collection, query=None, limit=None, after=None, projection=None, label=""):
+        """One _id-ordered page (or everything when limit is None)."""
+        try:
+            query = dict(query or {})
+            if after:
+                query["_id"] = {"$gt": ObjectId(after)}
+            cursor = collection.find(query, projection).sort("_id", 1)
+            if limit:
+                cursor = cursor.limit(limit)
+            return await cursor.to_list(None)
+        except Exception as e:
+            logger.warning("Error getting %s: %s", label, e)
+            return []
+
+    async def _get(self, collection, identifier, key_field, projection, label):
+        try:
+            try:
+                filter_q = {"_id": ObjectId(identifier)}
+            except Exception:
+                filter_q = {key_field: identifier}
+            return await collection.find_one(filter_q, projection)
+        except Exception as e:
+            logger.warning("Error getting %s: %s", label, e)
+            return None
+
+    async def _update(self, collection, kind, identifier, key_field, update_data, label):
+        try:
+            if not update_data:
+                return False
+            try:
+                filter_q = {"_id": ObjectId(identifier)}
+            except Exception:
+                filter_q = {key_field: identifier}
+            result = await collection.update_one(filter_q, {"$set": update_data})
+            self.resolver.invalidate(kind, identifier)
+            return result.modified_count > 0
+        except Exception as e:
+            logger.warning("Error updating %s: %s", label, e)
+            return False
+
+    async def _delete(self, collection, kind, identifier, key_field, label):
+        try:
+            filters = []
+            try:
+                filters.append({"_id": ObjectId(identifier)})
+            except Exception:
+                pass
+            filters.append({key_field: identifier.strip() if isinstance(identifier, str) else identifier})
+            result = await collection.delete_many({"$or": filters})
+            self.resolver.invalidate(kind, identifier)
+            return result.deleted_count > 0
+        except Exception as e:
+            logger.warning("Error deleting %s: %s", label, e)
+            return False
+
+    async def _add_references(self, docs, references, label):
+        """Add natural keys for (id field, kind, output field) references, one query per kind."""
+        try:
+            key_maps = await asyncio.gather(*(
+                self.resolver.natural_keys(kind, [d.get(id_field) for d in docs])
+                for id_field, kind, _ in references))
+        except Exception as e:
+            logger.warning("Error getting %s: %s", label, e)
+            return []
+        for (id_field, _, out_field), keys in zip(references, key_maps):
+            for d in docs:
+                d[out_field] = keys.get(d.get(id_field), str(d.get(id_field)))
+        return docs
+
+    # Teachers
+
+    async def add_teacher(self, employee_number, first_name, last_name, phone, email, department):
+        return await self._insert(self.db.teachers, {
+            "employee_number": employee_number,
+            "first_name": first_name,
+            "last_name": last_name,
+            "phone": phone,
+            "email": email,
+            "department": department,
+            "created_at": datetime.utcnow()
+        }, "teacher")
+
+    async def get_all_teachers(self, limit=None, after=None, projection=LIST_PROJECTIONS["teachers"]):
+        return await self._list(self.db.teachers, None, limit, after, projection, "teachers")
+
+    async def get_teacher(self, teacher_id, projection=None):
+        return await self._get(self.db.teachers, teacher_id, "employee_number", projection, "teacher")
+
+    async def update_teacher(self, teacher_id, **kwargs):
+        update_data = {k: v for k, v in kwargs.items() if v is not None}
+        return await self._update(self.db.teachers, "teacher", teacher_id, "employee_number", update_data, "teacher")
+
+    async def delete_teacher(self, teacher_id):
+        return await self._delete(self.db.teachers, "teacher", teacher_id, "employee_number", "teacher")
+
+    # Classes
+
+    async def add_class(self, class_name, form, class_teacher_id=None):
+        return await self._insert(self.db.classes, {
+            "name": class_name,
+            "form": form,
+            "class_teacher_id": ObjectId(class_teacher_id) if class_teacher_id else None,
+            "created_at": datetime.utcnow()
+        }, "class")
+
+    async def get_all_classes(self, limit=None, after=None, projection=LIST_PROJECTIONS["classes"]):
+        return await self._list(self.db.classes, None, limit, after, projection, "classes")
+
+    async def get_class(self, class_id, projection=None):
+        return await self._get(self.db.classes, class_id, "name", projection, "class")
+
+    # Students
+
+    async def add_student(self, admission_number, first_name, last_name, gender, date_of_birth, class_id, parent_phone=None):
+        class_obj_id = None
+        if class_id:
+            try:
+                class_obj_id = await self.resolver.resolve("class", class_id)
+            except Exception as e:
+                logger.warning("Error adding student: %s", e)
+                return None
+            if not class_obj_id:
+                logger.warning("Class with identifier %s not found", class_id)
+                return None
+        return await self._insert(self.db.students, {
+            "admission_number": admission_number,
+            "first_name": first_name,
+            "last_name": last_name,
+            "gender": gender,
+            "date_of_birth": EduTrackManager._as_datetime(date_of_birth),
+            "class_id": class_obj_id,
+            "parent_phone": parent_phone,
+            "created_at": datetime.utcnow()
+        }, "student")
+
+    async def get_all_students(self, limit=None, after=None, projection=LIST_PROJECTIONS["students"]):
+        return await self._list(self.db.students, None, limit, after, projection, "students")
+
+    async def get_student(self, student_id, projection=None):
+        return await self._get(self.db.students, student_id, "admission_number", projection, "student")
+
+    async def get_students_by_class(self, class_id, projection=LIST_PROJECTIONS["students"]):
+        try:
+            cls_obj_id = await self.resolver.resolve("class", class_id)
+        except Exception as e:
+            logger.warning("Error getting students: %s", e)
+            return []
+        if not cls_obj_id:
+            return []
+        return await self._list(self.db.students, {"class_id": cls_obj_id}, projection=projection, label="students")
+
+    async def update_student(self, student_id, **kwargs):
+        update_data = {k: v for k, v in kwargs.items() if v is not None}
+        return await self._update(self.db.students, "student", student_id, "admission_number", update_data, "student")
+
+    async def delete_student(self, student_id):
+        return await self._delete(self.db.students, "student", student_id, "admission_number", "student")
+
+    # Subjects
+
+    async def add_subject(self, name, code, teacher_id=None):
+        return await self._insert(self.db.subjects, {
+            "name": name,
+            "code": code,
+            "teacher_id": ObjectId(teacher_id) if teacher_id else None,
+            "created_at": datetime.utcnow()
+        }, "subject")
+
+    async def get_all_subjects(self, limit=None, after=None, projection=LIST_PROJECTIONS["subjects"]):
+        return await self._list(self.db.subjects, None, limit, after, projection, "subjects")
+
+    async def update_subject(self, subject_id, **kwargs):
+        update_data = {k: v for k, v in kwargs.items() if v is not None}
+        return await self._update(self.db.subjects, "subject", subject_id, "code", update_data, "subject")
+
+    async def delete_subject(self, subject_id):
+        return await self._delete(self.db.subjects, "subject", subject_id, "code", "subject")
+
+    # Attendance
+
+    async def record_attendance(self, student_id, attendance_date, status):
+        try:
+            sid_obj = await self.resolver.resolve("student", student_id)
+            if not sid_obj:
+                logger.warning("Student not found for identifier: %s", student_id)
+                return None
+            from pymongo import ReturnDocument
+            query, update = EduTrackManager._attendance_upsert(sid_obj, attendance_date, status)
+            before = await self.db.attendance.find_one_and_update(
+                query, update, projection={"status": 1}, upsert=True,
+                return_document=ReturnDocument.BEFORE)
+            changes = [(sid_obj, query["date"], status, 1)]
+            if before is not None:
+                changes.append((sid_obj, query["date"], before.get("status"), -1))
+            await self._apply_summary_changes(changes)
+            return str(before["_id"] if before is not None else update["$setOnInsert"]["_id"])
+        except Exception as e:
+            logger.warning("Error recording attendance: %s", e)
+            return None
+
+    async def get_student_attendance(self, student_id, projection=LIST_PROJECTIONS["attendance"]):
+        try:
+            sid_obj = await self.resolver.resolve("student", student_id)
+            if not sid_obj:
+                return []
+            return await self.db.attendance.find({"student_id": sid_obj}, projection).sort("date", -1).to_list(None)
+        except Exception as e:
+            logger.warning("Error getting attendance: %s", e)
+            return []
+
+    async def get_attendance_summary(self, student_id, term=None):
+        """Totals from attendance_summaries, optionally for one term ("2024-T1")."""
+        try:
+            sid_obj = await self.resolver.resolve("student", student_id)
+            if not sid_obj:
+                return None
+            query = {"student_id": sid_obj}
+            if term:
+                query["term"] = term
+            s = {"_id": sid_obj, "total": 0, "present": 0, "absent": 0, "late": 0}
+            async for doc in self.db.attendance_summaries.find(query):
+                for field in ("total", "present", "absent", "late"):
+                    s[field] += doc.get(field, 0)
+            return s if s["total"] else None
+        except Exception as e:
+            logger.warning("Error getting attendance summary: %s", e)
+            return None
+
+    async def get_all_attendance(self, limit=None, after=None, projection=LIST_PROJECTIONS["attendance"]):
+        """One page of attendance records with admission_number added."""
+        records = await self._list(self.db.attendance, None, limit, after, projection, "attendance")
+        return await self._add_references(records, [("student_id", "student", "admission_number")], "attendance")
+
+    async def update_attendance(self, attendance_id, date=None, status=None):
+        """Update attendance by id or 'admission|YYYY-MM-DD' (or a list of them)."""
+        try:
+            update_data = {}
+            if date is not None:
+                if isinstance(date, str):
+                    date = datetime.strptime(date, '%Y-%m-%d')
+                update_data['date'] = EduTrackManager._as_datetime(date)
+            if status is not None:
+                update_data['status'] = status
+            filters = await self._attendance_filters(attendance_id)
+            if not update_data or not filters:
+                return False
+            from pymongo import UpdateOne
+            before = await self._attendance_snapshot({"$or": filters})
+            try:
+                result = await self.db.attendance.bulk_write(
+                    [UpdateOne(f, {"$set": update_data}) for f in filters], ordered=False)
+            finally:
+                await self._apply_snapshot_changes(before)
+            return result.modified_count > 0
+        except Exception as e:
+            logger.warning("Error updating attendance: %s", e)
+            return False
+
+    async def delete_attendance(self, attendance_id):
+        """Delete attendance by id or 'admission|YYYY-MM-DD' (or a list of them)."""
+        try:
+            filters = await self._attendance_filters(attendance_id)
+            if not filters:
+                return False
+            from pymongo import DeleteMany
+            before = await self._attendance_snapshot({"$or": filters})
+            try:
+                result = await self.db.attendance.bulk_write([DeleteMany(f) for f in filters], ordered=False)
+            finally:
+                await self._apply_snapshot_changes(before)
+            return result.deleted_count > 0
+        except Exception as e:
+            logger.warning("Error deleting attendance: %s", e)
+            return False
+
+    async def _attendance_snapshot(self, query):
+        return {doc["_id"]: (doc["student_id"], doc["date"], doc.get("status"))
+                async for doc in self.db.attendance.find(query, {"student_id": 1, "date": 1, "status": 1})}
+
+    async def _apply_snapshot_changes(self, before):
+        if before:
+            after = await self._attendance_snapshot({"_id": {"$in": list(before)}})
+            await self._apply_summary_changes(EduTrackManager._snapshot_changes(before, after))
+
+    async def _apply_summary_changes(self, changes):
+        """Move attendance_summaries with $inc; see EduTrackManager._summary_requests."""
+        requests = EduTrackManager._summary_requests(changes)
+        if requests:
+            try:
+                await self.db.attendance_summaries.bulk_write(requests, ordered=False)
+            except Exception as e:
+                logger.warning("Attendance summaries not updated (%s); rebuild them", e)
+
+    async def rebuild_attendance_summaries(self):
+        """Recompute attendance_summaries from scratch; returns the summary count."""
+        try:
+            cursor = await self.db.attendance.aggregate(EduTrackManager._summary_rebuild_pipeline())
+            await cursor.to_list(None)
+            return await self.db.attendance_summaries.count_documents({})
+        except Exception as e:
+            logger.warning("Error rebuilding attendance summaries: %s", e)
+            return None
+
+    async def _attendance_filters(self, attendance_ids):
+        if isinstance(attendance_ids, (str, ObjectId)):
+            attendance_ids = [attendance_ids]
+        composites = [a.split('|', 1) for a in attendance_ids if isinstance(a, str) and '|' in a]
+        students = await self.resolver.resolve_many("student", [adm.strip() for adm, _ in composites])
+        filters = []
+        for aid in attendance_ids:
+            if isinstance(aid, str) and '|' in aid:
+                adm, date_s = (part.strip() for part in aid.split('|', 1))
+                try:
+                    date_obj = datetime.strptime(date_s, '%Y-%m-%d')
+                except Exception:
+                    continue
+                if adm in students:
+                    filters.append({"student_id": students[adm], "date": date_obj})
+            else:
+                try:
+                    filters.append({"_id": ObjectId(aid)})
+                except Exception:
+                    continue
+        return filters
+
+    # Exams
+
+    async def add_exam(self, name, exam_date, class_id):
+        try:
+            cls_obj_id = await self.resolver.resolve("class", class_id)
+        except Exception as e:
+            logger.warning("Error adding exam: %s", e)
+            return None
+        if not cls_obj_id:
+            logger.warning("Class not found for identifier: %s", class_id)
+            return None
+        return await self._insert(self.db.exams, {
+            "name": name,
+            "date": EduTrackManager._as_datetime(exam_date),
+            "class_id": cls_obj_id,
+            "created_at": datetime.utcnow()
+        }, "exam")
+
+    async def get_all_exams(self, limit=None, after=None, projection=LIST_PROJECTIONS["exams"]):
+        return await self._list(self.db.exams, None, limit, after, projection, "exams")
+
+    async def get_exam(self, exam_id, projection=None):
+        return await self._get(self.db.exams, exam_id, "name", projection, "exam")
+
+    async def update_exam(self, exam_id, **kwargs):
+        update_data = {k: v for k, v in kwargs.items() if v is not None}
+        if 'date' in update_data:
+            update_data['date'] = EduTrackManager._as_datetime(update_data['date'])
+        if update_data.get('class_id'):
+            try:
+                update_data['class_id'] = await self.resolver.resolve("class", update_data['class_id'])
+            except Exception as e:
+                logger.warning("Error updating exam: %s", e)
+                return False
+        return await self._update(self.db.exams, "exam", exam_id, "name", update_data, "exam")
+
+    async def delete_exam(self, exam_id):
+        return await self._delete(self.db.exams, "exam", exam_id, "name", "exam")
+
+    # Results
+
+    async def record_result(self, student_id, exam_id, subject_id, score, remarks=None):
+        """Save (upsert) a result; the three identifiers are resolved concurrently."""
+        try:
+            sid_obj, eid_obj, subid_obj = await asyncio.gather(
+                self.resolver.resolve("student", student_id),
+                self.resolver.resolve("exam", exam_id),
+                self.resolver.resolve("subject", subject_id),
+            )
+            if not (sid_obj and eid_obj and subid_obj):
+                logger.warning("Could not resolve result identifiers: %s / %s / %s", student_id, exam_id, subject_id)
+                return None
+            from pymongo import ReturnDocument
+            query, update = EduTrackManager._result_upsert(
+                sid_obj, eid_obj, subid_obj, score, self.grade_scale.grade(score), remarks)
+            before = await self.db.results.find_one_and_update(
+                query, update, projection={"score": 1}, upsert=True,
+                return_document=ReturnDocument.BEFORE)
+            if before is None:
+                await self._apply_result_changes([(sid_obj, eid_obj, subid_obj, score, 1)])
+            elif before.get("score") != score:
+                await self._apply_result_changes([(sid_obj, eid_obj, subid_obj, score, 1),
+                                                  (sid_obj, eid_obj, subid_obj, before.get("score"), -1)])
+            return str(before["_id"] if before is not None else update["$setOnInsert"]["_id"])
+        except Exception as e:
+            logger.warning("Error recording result: %s", e)
+            return None
+
+    async def get_student_results(self, student_id, projection=LIST_PROJECTIONS["results"]):
+        try:
+            sid_obj = await self.resolver.resolve("student", student_id)
+        except Exception as e:
+            logger.warning("Error getting results: %s", e)
+            return []
+        if not sid_obj:
+            return []
+        return await self._list(self.db.results, {"student_id": sid_obj}, projection=projection, label="results")
+
+    async def get_all_results(self, limit=None, after=None, projection=LIST_PROJECTIONS["results"]):
+        """One page of results with admission_number, exam_name and subject_code added."""
+        results = await self._list(self.db.results, None, limit, after, projection, "results")
+        return await self._add_references(results, [
+            ("student_id", "student", "admission_number"),
+            ("exam_id", "exam", "exam_name"),
+            ("subject_id", "subject", "subject_code"),
+        ], "results")
+
+    async def update_result(self, result_id, score=None, remarks=None):
+        try:
+            update_data = {}
+            if score is not None:
+                update_data['score'] = float(score)
+                update_data['grade'] = self.grade_scale.grade(update_data['score'])
+            if remarks is not None:
+                update_data['remarks'] = remarks
+            if not update_data:
+                return False
+            from pymongo import ReturnDocument
+            before = await self.db.results.find_one_and_update(
+                {"_id": ObjectId(result_id)}, {'$set': update_data},
+                projection={"student_id": 1, "exam_id": 1, "subject_id": 1, "score": 1},
+                return_document=ReturnDocument.BEFORE)
+            if before is None:
+                return False
+            if 'score' in update_data and before.get("score") != update_data['score']:
+                keys = (before["student_id"], before["exam_id"], before["subject_id"])
+                await self._apply_result_changes([(*keys, before.get("score"), -1),
+                                                  (*keys, update_data['score'], 1)])
+            return True
+        except Exception as e:
+            logger.warning("Error updating result: %s", e)
+            return False
+
+    async def delete_result(self, result_id):
+        try:
+            doc = await self.db.results.find_one_and_delete(
+                {"_id": ObjectId(result_id)},
+                projection={"student_id": 1, "exam_id": 1, "subject_id": 1, "score": 1})
+            if doc is None:
+                return False
+            await self._apply_result_changes([(doc["student_id"], doc["exam_id"], doc["subject_id"], doc.get("score"), -1)])
+            return True
+        except Exception as e:
+            logger.warning("Error deleting result: %s", e)
+            return False
+
+    async def get_result_stats(self, scope, identifier):
+        """Precomputed {"count", "sum", "min", "max", "mean"} for a student, exam or subject."""
+        try:
+            key = await self.resolver.resolve(scope, identifier)
+            doc = await self.db.result_stats.find_one({"scope": scope, "key": key}) if key else None
+            if not doc or not doc.get("count"):
+                return None
+            stats = {field: doc.get(field) for field in ("count", "sum", "min", "max")}
+            stats["mean"] = stats["sum"] / stats["count"]
+            return stats
+        except Exception as e:
+            logger.warning("Error getting result stats: %s", e)
+            return None
+
+    async def _apply_result_changes(self, changes):
+        """Move result_stats; see EduTrackManager._apply_result_changes."""
+        try:
+            requests, removed = EduTrackManager._result_stat_requests(changes)
+            if requests:
+                await self.db.result_stats.bulk_write(requests, ordered=False)
+            if removed:
+                stale = await self.db.result_stats.find(
+                    {"$or": [{"scope": scope, "key": key, "$or": [{"min": {"$in": list(scores)}},
+                                                                   {"max": {"$in": list(scores)}},
+                                                                   {"count": {"$lte": 0}}]}
+                             for (scope, key), scores in removed.items()]},
+                    {"scope": 1, "key": 1}).to_list(None)
+                for doc in stale:
+                    scope, key = doc["scope"], doc["key"]
+                    cursor = await self.db.results.aggregate(EduTrackManager._result_stats_pipeline(
+                        scope, {RESULT_STAT_SCOPES[scope]: key}))
+                    rows = await cursor.to_list(None)
+                    if rows:
+                        await self.db.result_stats.replace_one({"scope": scope, "key": key}, rows[0], upsert=True)
+                    else:
+                        await self.db.result_stats.delete_one({"scope": scope, "key": key})
+        except Exception as e:
+            logger.warning("Result stats not updated (%s); rebuild them", e)
+
+    # Batch operations
+    #
+    # Same record shapes and per-row reports as the sync *_bulk methods.
+    # Each chunk resolves its identifiers concurrently with asyncio.gather
+    # and is written with one unordered insert_many (or bulk upsert), so
+    # several batches (or several teachers' submissions) can be awaited
+    # together. A chunk whose identifiers cannot be resolved is reported as
+    # failed row by row; earlier chunks keep their reports.
+
+    async def record_attendance_bulk(self, records, chunk_size=1000, upsert=False):
+        """With upsert=True records upsert on (student_id, date), as in the sync manager."""
+        async def build(chunk):
+            students = await self.resolver.resolve_many("student", [r.get("student_id") for r in chunk])
+            return EduTrackManager._attendance_documents(chunk, students)
+
+        if upsert:
+            return await self._bulk_upsert(
+                records, build, chunk_size, lambda d: (d["student_id"], d["date"]),
+                lambda latest: self._write_attendance_marks({k: d["status"] for k, d in latest.items()}))
+
+        async def count(docs):
+            await self._apply_summary_changes([(d["student_id"], d["date"], d["status"], 1) for d in docs])
+        return await self._bulk_insert(self.db.attendance, records, build, chunk_size, on_written=count)
+
+    async def record_results_bulk(self, records, chunk_size=1000, upsert=False):
+        """With upsert=True records upsert on (student_id, exam_id, subject_id), as in the sync manager."""
+        async def build(chunk):
+            students, exams, subjects = await asyncio.gather(
+                self.resolver.resolve_many("student", [r.get("student_id") for r in chunk]),
+                self.resolver.resolve_many("exam", [r.get("exam_id") for r in chunk]),
+                self.resolver.resolve_many("subject", [r.get("subject_id") for r in chunk]),
+            )
+            return EduTrackManager._result_documents(chunk, students, exams, subjects, self.grade_scale)
+
+        if upsert:
+            return await self._bulk_upsert(
+                records, build, chunk_size, lambda d: (d["student_id"], d["exam_id"], d["subject_id"]),
+                lambda latest: self._write_result_marks({k: (d["score"], d.get("remarks")) for k, d in latest.items()}))
+
+        async def count(docs):
+            await self._apply_result_changes([(d["student_id"], d["exam_id"], d["subject_id"], d["score"], 1) for d in docs])
+        return await self._bulk_insert(self.db.results, records, build, chunk_size, on_written=count)
+
+    async def _bulk_insert(self, collection, records, build, chunk_size, on_written=None):
+        from pymongo.errors import BulkWriteError
+        reports = []
+        row = 0
+        for chunk in _chunked(records, chunk_size):
+            docs, positions = EduTrackManager._split_outcomes(await self._build_chunk(build, chunk), row, reports)
+            if docs:
+                failed = {}
+                try:
+                    await collection.insert_many(docs, ordered=False)
+                except BulkWriteError as e:
+                    failed = EduTrackManager._write_errors(e)
+                except Exception as e:
+                    failed = {i: str(e) for i in range(len(docs))}
+                EduTrackManager._insert_reports(docs, positions, failed, reports)
+                if on_written is not None:
+                    await on_written([doc for i, doc in enumerate(docs) if i not in failed])
+            row += len(chunk)
+        reports.sort(key=lambda r: r["row"])
+        return reports
+
+    async def _bulk_upsert(self, records, build, chunk_size, key, write):
+        """Async EduTrackManager._bulk_upsert: last record per key in a chunk wins."""
+        reports = []
+        row = 0
+        for chunk in _chunked(records, chunk_size):
+            docs, positions = EduTrackManager._split_outcomes(await self._build_chunk(build, chunk), row, reports)
+            if docs:
+                latest = EduTrackManager._latest_by_key(docs, key)
+                try:
+                    _, failed = await write(latest)
+                except Exception as e:
+                    failed = {i: str(e) for i in range(len(latest))}
+                EduTrackManager._upsert_reports(docs, positions, key, list(latest), failed, reports)
+            row += len(chunk)
+        reports.sort(key=lambda r: r["row"])
+        return reports
+
+    @staticmethod
+    async def _build_chunk(build, chunk):
+        """await build(chunk), or the error as every row's outcome if it raises."""
+        try:
+            return await build(chunk)
+        except Exception as e:
+            logger.warning("Error resolving identifiers for %d rows: %s", len(chunk), e)
+            return [f"Error resolving identifiers: {e}"] * len(chunk)
+
+    async def _write_attendance_marks(self, marks):
+        """Async EduTrackManager._write_attendance_marks."""
+        from pymongo import UpdateOne
+        from pymongo.errors import BulkWriteError
+        keys = list(marks)
+        if not keys:
+            return EduTrackManager._upsert_counts(0)
+        fields = ("student_id", "date")
+        before = {(doc["student_id"], doc["date"]): doc.get("status") async for doc in self.db.attendance.find(
+            EduTrackManager._marks_query(fields, keys), {"student_id": 1, "date": 1, "status": 1})}
+        requests = [UpdateOne(*EduTrackManager._attendance_upsert(sid, day, marks[(sid, day)]), upsert=True)
+                    for sid, day in keys]
+        try:
+            counts, failed = EduTrackManager._upsert_counts(
+                len(keys), result=await self.db.attendance.bulk_write(requests, ordered=False))
+        except BulkWriteError as e:
+            counts, failed = EduTrackManager._upsert_counts(len(keys), error=e)
+        await self._apply_summary_changes(EduTrackManager._mark_changes(marks, before, failed))
+        return counts, failed
+
+    async def _write_result_marks(self, marks):
+        """Async EduTrackManager._write_result_marks."""
+        from pymongo.errors import BulkWriteError
+        keys = list(marks)
+        if not keys:
+            return EduTrackManager._upsert_counts(0)
+        fields = ("student_id", "exam_id", "subject_id")
+        before = {tuple(doc[f] for f in fields): doc.get("score") async for doc in self.db.results.find(
+            EduTrackManager._marks_query(fields, keys), {"student_id": 1, "exam_id": 1, "subject_id": 1, "score": 1})}
+        try:
+            counts, failed = EduTrackManager._upsert_counts(len(keys), result=await self.db.results.bulk_write(
+                EduTrackManager._result_mark_requests(marks, self.grade_scale), ordered=False))
+        except BulkWriteError as e:
+            counts, failed = EduTrackManager._upsert_counts(len(keys), error=e)
+        await self._apply_result_changes(EduTrackManager._mark_changes(marks, before, failed, value=lambda mark: mark[0]))
+        return counts, failed
@@ -0,0 +1,170 @@
+# edutrack_analytics.py
+"""Columnar analytics over EduTrack results (needs NumPy).
+
+results_frame() streams the results collection once into NumPy arrays:
+scores as float64 and students, exams, subjects and classes as int32 codes
+into small category tables. Group-by statistics and grade distributions
+are then vectorized over the codes instead of looping over documents.
+"""
+
+from array import array
+
+from edutrack_manager import DEFAULT_GRADE_SCALE
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+
+# dimension -> (results field, natural-key kind used for labels)
+DIMENSIONS = {
+    "student": ("student_id", "student"),
+    "exam": ("exam_id", "exam"),
+    "subject": ("subject_id", "subject"),
+    "class": (None, "class"),  # derived from each student's class_id
+}
+
+
+class ResultsFrame:
+    """Results as parallel NumPy columns with integer-coded categoricals.
+
+    codes[dim][i] indexes categories[dim] (ObjectIds) and labels[dim]
+    (natural keys: admission number, exam name, subject code, class name)
+    for row i; score[i] is the row's score. Class code -1 means the student
+    has no class.
+    """
+
+    def __init__(self, score, codes, categories, labels):
+        self.score = score
+        self.codes = codes
+        self.categories = categories
+        self.labels = labels
+
+    def __len__(self):
+        return len(self.score)
+
+    @property
+    def nbytes(self):
+        """Memory held by the columns (category tables excluded)."""
+        return self.score.nbytes + sum(c.nbytes for c in self.codes.values())
+
+    def _group_codes(self, by):
+        """One int64 code per row for a dimension or a tuple of dimensions."""
+        dims = (by,) if isinstance(by, str) else tuple(by)
+        combined = np.zeros(len(self), dtype=np.int64)
+        valid = np.ones(len(self), dtype=bool)
+        for dim in dims:
+            codes = self.codes[dim]
+            valid &= codes >= 0
+            combined = combined * len(self.categories[dim]) + np.maximum(codes, 0)
+        return dims, combined, valid
+
+    def _group_label(self, dims, code):
+        parts = []
+        for dim in reversed(dims):
+            code, index = divmod(int(code), len(self.categories[dim]))
+            parts.append(self.labels[dim][index])
+        parts.reverse()
+        return parts[0] if len(parts) == 1 else tuple(parts)
+
+    def group_stats(self, by):
+        """count/mean/min/max/std of scores per group, sorted by group label.
+
+        by is "student", "exam", "subject", "class" or a tuple of them
+        (e.g. ("class", "subject") to compare classes per subject).
+        """
+        dims, codes, valid = self._group_codes(by)
+        codes, score = codes[valid], self.score[valid]
+        if not len(codes):
+            return []
+        groups, inverse, count = np.unique(codes, return_inverse=True, return_counts=True)
+        total = np.bincount(inverse, weights=score)
+        squares = np.bincount(inverse, weights=score * score)
+        mean = total / count
+        std = np.sqrt(np.maximum(squares / count - mean * mean, 0.0))
+
+        # min/max: sort by (group, score); each group's first/last element
+        order = np.lexsort((score, inverse))
+        ends = np.cumsum(count)
+        low = score[order][ends - count]
+        high = score[order][ends - 1]
+
+        rows = [{"group": self._group_label(dims, g), "count": int(n), "mean": float(m),
+                 "min": float(lo), "max": float(hi), "std": float(s)}
+                for g, n, m, lo, hi, s in zip(groups, count, mean, low, high, std)]
+        rows.sort(key=lambda r: str(r["group"]))
+        return rows
+
+    def grade_distribution(self, by=None, scale=DEFAULT_GRADE_SCALE):
+        """Count of each grade, overall or per group: {group: {grade: count}}.
+
+        Grades are assigned with np.searchsorted on the scale's cut-offs, the
+        vectorized equivalent of GradeScale.grade_many.
+        """
+        bounds = np.asarray([bound for bound, _ in scale.cutoffs], dtype=np.float64)
+        grades = [scale.fail_grade] + [grade for _, grade in scale.cutoffs]
+        grade_index = np.searchsorted(bounds, self.score, side="right")
+        n_grades = len(grades)
+        if by is None:
+            counts = np.bincount(grade_index, minlength=n_grades)
+            return {None: dict(zip(grades, counts.tolist()))}
+        dims, codes, valid = self._group_codes(by)
+        groups, inverse = np.unique(codes[valid], return_inverse=True)
+        counts = np.bincount(inverse * n_grades + grade_index[valid],
+                             minlength=len(groups) * n_grades).reshape(len(groups), n_grades)
+        return {self._group_label(dims, g): dict(zip(grades, row))
+                for g, row in zip(groups, counts.tolist())}
+
+
+def results_frame(manager, filter=None, batch_size=5000):
+    """Load results matching filter (a results query) into a ResultsFrame.
+
+    One pass over a server-side cursor fetching only the id and score
+    fields; rows are appended to typed arrays, never kept as dicts. Labels
+    cost one $in query per dimension, plus one for the students' classes.
+    """
+    if np is None:
+        raise RuntimeError("results_frame needs NumPy (pip install numpy)")
+
+    dims = ("student", "exam", "subject")
+    code_maps = {dim: {} for dim in dims}
+    columns = {dim: array("i") for dim in dims}
+    scores = array("d")
+    projection = {"_id": 0, "student_id": 1, "exam_id": 1, "subject_id": 1, "score": 1}
+    for doc in manager.db.results.find(filter or {}, projection).batch_size(batch_size):
+        score = doc.get("score")
+        if isinstance(score, bool) or not isinstance(score, (int, float)):
+            continue
+        scores.append(score)
+        for dim in dims:
+            oid = doc.get(DIMENSIONS[dim][0])
+            codes = code_maps[dim]
+            code = codes.get(oid)
+            if code is None:
+                code = codes[oid] = len(codes)
+            columns[dim].append(code)
+
+    codes = {dim: np.frombuffer(columns[dim], dtype=np.int32) if len(columns[dim]) else np.zeros(0, np.int32)
+             for dim in dims}
+    categories = {dim: list(code_maps[dim]) for dim in dims}
+
+    # class of each student, mapped through the student codes
+    student_class = {s["_id"]: s.get("class_id") for s in manager.db.students.find(
+        {"_id": {"$in": categories["student"]}}, {"class_id": 1})}
+    class_codes = {}
+    per_student = np.full(len(categories["student"]), -1, dtype=np.int32)
+    for index, oid in enumerate(categories["student"]):
+        cid = student_class.get(oid)
+        if cid is not None:
+            per_student[index] = class_codes.setdefault(cid, len(class_codes))
+    codes["class"] = per_student[codes["student"]]
+    categories["class"] = list(class_codes)
+
+    labels = {}
+    for dim, cats in categories.items():
+        keys = manager.resolver.natural_keys(DIMENSIONS[dim][1], cats)
+        labels[dim] = [keys.get(oid, str(oid)) for oid in cats]
+
+    score = np.frombuffer(scores, dtype=np.float64) if len(scores) else np.zeros(0)
+    return ResultsFrame(score, codes, categories, labels)
@@ -0,0 +1,150 @@
+# edutrack_buffer.py
+"""Write-behind buffering for high-rate attendance capture."""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from edutrack_manager import EduTrackManager, _chunked
+
+
+class AttendanceWriteBuffer:
+    """Collect attendance marks in memory and write them in batches.
+
+    A background thread flushes whenever max_batch marks are waiting or
+    flush_interval seconds have passed. Each flush resolves its students in
+    one query and writes one unordered bulk_write of (student_id, date)
+    upserts, so the latest mark for a day wins, as with record_attendance,
+    and attendance summaries stay current.
+
+    Back-pressure: at most max_pending marks are held; record() then blocks
+    (up to timeout seconds) until a flush makes room.
+
+    durable=False returns from record() as soon as the mark is queued;
+    failures are counted and the most recent kept in errors. durable=True
+    makes record() wait until its batch is acknowledged with a journaled
+    majority write concern, and return whether it was saved; callers still
+    share one round trip per batch.
+
+    Create one with EduTrackManager.attendance_buffer(); close_connection()
+    flushes and stops it.
+    """
+
+    def __init__(self, manager, max_batch=500, flush_interval=1.0, max_pending=10000, durable=False):
+        self.manager = manager
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.durable = durable
+        self.errors = deque(maxlen=100)
+        self.counts = {"queued": 0, "written": 0, "failed": 0, "flushes": 0}
+        self._pending = []
+        self._cond = threading.Condition()
+        # held for the whole take-and-write so batches reach the server in order
+        self._write_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="edutrack-attendance-buffer", daemon=True)
+        self._thread.start()
+
+    def record(self, student_id, attendance_date, status, timeout=None):
+        """Queue one mark. Returns False if the buffer is closed or stays full
+        for timeout seconds; in durable mode returns whether it was saved."""
+        waiter = Future() if self.durable else None
+        with self._cond:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while len(self._pending) >= self.max_pending and not self._closed:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self.manager._say(" Attendance buffer full; mark not queued")
+                    return False
+                self._cond.wait(remaining)
+            if self._closed:
+                return False
+            self._pending.append((student_id, attendance_date, status, waiter))
+            self.counts["queued"] += 1
+            if len(self._pending) >= self.max_batch:
+                self._cond.notify_all()
+        return waiter.result() if waiter else True
+
+    def flush(self):
+        """Write everything queued so far; returns the number of marks taken."""
+        with self._write_lock:
+            with self._cond:
+                batch, self._pending = self._pending, []
+                self._cond.notify_all()  # wake producers blocked on a full buffer
+            for chunk in _chunked(batch, self.max_batch):
+                self._write(chunk)
+            return len(batch)
+
+    def close(self):
+        """Stop the flush thread after writing whatever is still queued."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self.flush()
+
+    def pending(self):
+        with self._cond:
+            return len(self._pending)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._closed and len(self._pending) < self.max_batch:
+                    self._cond.wait(self.flush_interval)
+                if self._closed:
+                    return
+            try:
+                self.flush()
+            except Exception as e:
+                # keep the thread alive; marks in the failed batch are reported in _write
+                self.errors.append(str(e))
+
+    def _write(self, batch):
+        """Upsert one batch, settling each mark's waiter."""
+        outcomes = [None] * len(batch)  # None = saved, else error message
+        try:
+            students = self.manager.resolver.resolve_many("student", [entry[0] for entry in batch])
+            # last mark per (student, day) wins; earlier ones are superseded, not failed
+            latest = {}
+            for i, (student_id, attendance_date, status, _) in enumerate(batch):
+                sid = students.get(student_id)
+                if sid is None:
+                    outcomes[i] = f"Student not found for identifier: {student_id}"
+                    continue
+                latest[(sid, EduTrackManager._as_datetime(attendance_date))] = i
+
+            if latest:
+                # same write path as record_class_attendance, summaries included
+                positions = list(latest.values())
+                marks = {key: batch[i][2] for key, i in latest.items()}
+                _, failed = self.manager._write_attendance_marks(marks, self._collection())
+                for index, message in failed.items():
+                    outcomes[positions[index]] = message
+        except Exception as e:
+            outcomes = [outcome or str(e) for outcome in outcomes]
+
+        failed = 0
+        for (_, _, _, waiter), outcome in zip(batch, outcomes):
+            if outcome is not None:
+                failed += 1
+                self.errors.append(outcome)
+            if waiter is not None:
+                waiter.set_result(outcome is None)
+        with self._cond:
+            self.counts["flushes"] += 1
+            self.counts["written"] += len(batch) - failed
+            self.counts["failed"] += failed
+        if failed:
+            self.manager._say(f" Attendance buffer: {failed} of {len(batch)} marks failed")
+
+    def _collection(self):
+        collection = self.manager.db.attendance
+        if self.durable:
+            from pymongo import WriteConcern
+            collection = collection.with_options(write_concern=WriteConcern(w="majority", j=True))
+        return collection
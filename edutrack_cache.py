@@ -0,0 +1,282 @@
+# edutrack_cache.py
+"""Caching helpers for EduTrack: natural-key resolution and reference data."""
+
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from threading import Lock
+
+
+# kind -> (collection, natural key field) used by the ObjectId-or-key fallback
+NATURAL_KEYS = {
+    "teacher": ("teachers", "employee_number"),
+    "class": ("classes", "name"),
+    "student": ("students", "admission_number"),
+    "subject": ("subjects", "code"),
+    "exam": ("exams", "name"),
+}
+
+# Small, rarely changing collections served through ReferenceCache
+REFERENCE_COLLECTIONS = {
+    "teacher": "teachers",
+    "class": "classes",
+    "subject": "subjects",
+    "exam": "exams",
+}
+
+
+class LRUCache:
+    """Thread-safe mapping that evicts the least recently used entry when full.
+
+    With ttl (seconds), entries also expire that long after they were put.
+    Lookups are counted in hits/misses.
+    """
+
+    def __init__(self, maxsize=4096, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+                del self._data[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._data.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value):
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, predicate):
+        """Remove every entry for which predicate(key, value) is true."""
+        with self._lock:
+            for key in [k for k, (v, _) in self._data.items() if predicate(k, v)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """{"size", "hits", "misses", "hit_rate"} since creation."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"size": len(self._data), "hits": self.hits, "misses": self.misses,
+                    "hit_rate": self.hits / lookups if lookups else 0.0}
+
+    def __len__(self):
+        return len(self._data)
+
+
+class _ResolverBase:
+    """Cache bookkeeping shared by the sync and async resolvers."""
+
+    def __init__(self, db, maxsize=4096):
+        self.db = db
+        self._cache = LRUCache(maxsize)
+
+    def _split(self, kind, identifiers):
+        """Resolve what needs no query; return (resolved, natural keys to look up)."""
+        from bson import ObjectId
+        resolved, misses = {}, set()
+        for ident in identifiers:
+            if not ident or ident in resolved:
+                continue
+            try:
+                resolved[ident] = ObjectId(ident)
+                continue
+            except Exception:
+                pass
+            oid = self._cache.get((kind, ident))
+            if oid is None:
+                misses.add(ident)
+            else:
+                resolved[ident] = oid
+        return resolved, misses
+
+    def _remember(self, kind, field, doc, mapping, forward=True):
+        """Cache a fetched document's key and record it in mapping."""
+        if field not in doc:
+            return
+        self._cache.put((kind, doc[field]), doc["_id"])
+        if forward:
+            mapping[doc[field]] = doc["_id"]
+        else:
+            mapping[doc["_id"]] = doc[field]
+
+    def invalidate(self, kind, identifier=None):
+        """Forget cached entries for one identifier (key or id), or a whole kind."""
+        from bson import ObjectId
+        if identifier is None:
+            self._cache.discard(lambda k, v: k[0] == kind)
+            return
+        try:
+            oid = ObjectId(identifier)
+        except Exception:
+            oid = None
+        if isinstance(identifier, str):
+            identifier = identifier.strip()
+        self._cache.discard(lambda k, v: k[0] == kind and (k[1] == identifier or v == oid))
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        return self._cache.stats()
+
+
+class IdentifierResolver(_ResolverBase):
+    """Resolve ObjectId strings or natural keys to ObjectIds.
+
+    Natural-key lookups are cached in a bounded LRU keyed by (kind, key).
+    Callers that change or remove a record must call invalidate().
+    """
+
+    def resolve(self, kind, identifier):
+        """Return the ObjectId for an identifier, or None if it does not exist."""
+        return self.resolve_many(kind, [identifier]).get(identifier) if identifier else None
+
+    def resolve_many(self, kind, identifiers):
+        """Map many identifiers to ObjectIds; cache misses cost one $in query.
+
+        Identifiers that cannot be resolved are absent from the result.
+        """
+        resolved, misses = self._split(kind, identifiers)
+        if misses:
+            coll_name, field = NATURAL_KEYS[kind]
+            for doc in self.db[coll_name].find({field: {"$in": list(misses)}}, {field: 1}):
+                self._remember(kind, field, doc, resolved)
+        return resolved
+
+    def natural_keys(self, kind, object_ids):
+        """Map ObjectIds back to their natural keys with one $in query."""
+        ids = list({oid for oid in object_ids if oid is not None})
+        keys = {}
+        if ids:
+            coll_name, field = NATURAL_KEYS[kind]
+            for doc in self.db[coll_name].find({"_id": {"$in": ids}}, {field: 1}):
+                self._remember(kind, field, doc, keys, forward=False)
+        return keys
+
+
+class AsyncIdentifierResolver(_ResolverBase):
+    """IdentifierResolver for an async (AsyncMongoClient) database."""
+
+    async def resolve(self, kind, identifier):
+        """Return the ObjectId for an identifier, or None if it does not exist."""
+        return (await self.resolve_many(kind, [identifier])).get(identifier) if identifier else None
+
+    async def resolve_many(self, kind, identifiers):
+        """Map many identifiers to ObjectIds; cache misses cost one $in query."""
+        resolved, misses = self._split(kind, identifiers)
+        if misses:
+            coll_name, field = NATURAL_KEYS[kind]
+            async for doc in self.db[coll_name].find({field: {"$in": list(misses)}}, {field: 1}):
+                self._remember(kind, field, doc, resolved)
+        return resolved
+
+    async def natural_keys(self, kind, object_ids):
+        """Map ObjectIds back to their natural keys with one $in query."""
+        ids = list({oid for oid in object_ids if oid is not None})
+        keys = {}
+        if ids:
+            coll_name, field = NATURAL_KEYS[kind]
+            async for doc in self.db[coll_name].find({"_id": {"$in": ids}}, {field: 1}):
+                self._remember(kind, field, doc, keys, forward=False)
+        return keys
+
+
+class ReferenceCache:
+    """Read-through TTL cache for teachers, classes, subjects and exams.
+
+    Documents are cached by (kind, ObjectId), and each kind's full listing
+    (sorted by _id) under (kind, "*"). Entries expire after ttl seconds so
+    changes made by other processes show up; callers that write must call
+    invalidate(). Cached documents are shared: callers get copies.
+    """
+
+    def __init__(self, db, ttl=300, maxsize=4096):
+        self.db = db
+        self._cache = LRUCache(maxsize, ttl)
+
+    def get(self, kind, oid):
+        """The document with this ObjectId, or None."""
+        return self.get_many(kind, [oid]).get(oid)
+
+    def get_many(self, kind, object_ids):
+        """Map ObjectIds to documents; cache misses cost one $in query."""
+        found, misses = {}, set()
+        for oid in object_ids:
+            if oid is None or oid in found:
+                continue
+            doc = self._cache.get((kind, oid))
+            if doc is None:
+                misses.add(oid)
+            else:
+                found[oid] = dict(doc)
+        if misses:
+            for doc in self.db[REFERENCE_COLLECTIONS[kind]].find({"_id": {"$in": list(misses)}}):
+                self._cache.put((kind, doc["_id"]), doc)
+                found[doc["_id"]] = dict(doc)
+        return found
+
+    def page(self, kind, after=None, limit=None):
+        """Documents in _id order after the given id, like a keyset page."""
+        from bson import ObjectId
+        listing = self._cache.get((kind, "*"))
+        if listing is None:
+            docs = list(self.db[REFERENCE_COLLECTIONS[kind]].find().sort("_id", 1))
+            listing = (docs, [d["_id"] for d in docs])
+            self._cache.put((kind, "*"), listing)
+            for doc in docs:
+                self._cache.put((kind, doc["_id"]), doc)
+        docs, ids = listing
+        start = bisect_right(ids, ObjectId(after)) if after else 0
+        end = start + limit if limit else len(docs)
+        return [dict(d) for d in docs[start:end]]
+
+    def warm(self, kinds=None):
+        """Load every document of the given kinds (default: all); returns the count."""
+        return sum(len(self.page(kind)) for kind in (kinds or REFERENCE_COLLECTIONS))
+
+    def invalidate(self, kind, identifier=None):
+        """Forget one record (by id or natural key) and its kind's listing, or a whole kind."""
+        from bson import ObjectId
+        if kind not in REFERENCE_COLLECTIONS:
+            return
+        if identifier is None:
+            self._cache.discard(lambda k, v: k[0] == kind)
+            return
+        try:
+            oid = ObjectId(identifier)
+        except Exception:
+            oid = None
+        field = NATURAL_KEYS[kind][1]
+        if isinstance(identifier, str):
+            identifier = identifier.strip()
+        self._cache.discard(lambda k, v: k[0] == kind and (
+            k[1] in ("*", oid) or (isinstance(v, dict) and v.get(field) == identifier)))
+
+    def invalidate_listing(self, kind):
+        """Forget a kind's cached listing, e.g. after records were added."""
+        self._cache.discard(lambda k, v: k == (kind, "*"))
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        return self._cache.stats()
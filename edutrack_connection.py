@@ -0,0 +1,85 @@
+# edutrack_connection.py
+"""Process-wide MongoDB client shared by every EduTrackManager."""
+
+import atexit
+import json
+import os
+import threading
+
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), 'config.json')
+
+# MongoClient option -> (environment variable, config.json key, type)
+POOL_SETTINGS = {
+    "maxPoolSize": ("EDUTRACK_MAX_POOL_SIZE", "max_pool_size", int),
+    "minPoolSize": ("EDUTRACK_MIN_POOL_SIZE", "min_pool_size", int),
+    "maxIdleTimeMS": ("EDUTRACK_MAX_IDLE_TIME_MS", "max_idle_time_ms", int),
+    "serverSelectionTimeoutMS": ("EDUTRACK_SERVER_SELECTION_TIMEOUT_MS", "server_selection_timeout_ms", int),
+    # comma separated, e.g. "zstd,snappy"; needs the zstandard / python-snappy packages
+    "compressors": ("EDUTRACK_COMPRESSORS", "compressors", str),
+}
+
+_lock = threading.Lock()
+_client = None
+
+
+def load_config():
+    """Return the settings from config.json, or {} when there is none."""
+    if not os.path.exists(CONFIG_PATH):
+        return {}
+    try:
+        with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def connection_settings():
+    """Resolve the connection string and client options from env or config.json.
+
+    Environment variables take precedence over config.json.
+    """
+    cfg = load_config()
+    connection_string = os.environ.get('EDUTRACK_MONGODB_URI') or cfg.get('mongodb_uri')
+    if not connection_string:
+        raise RuntimeError('MongoDB connection string not found. Set EDUTRACK_MONGODB_URI env var or create config.json with {"mongodb_uri": "<uri>"}.')
+
+    options = {}
+    for option, (env_var, cfg_key, kind) in POOL_SETTINGS.items():
+        value = os.environ.get(env_var, cfg.get(cfg_key))
+        if value in (None, ""):
+            continue
+        try:
+            options[option] = kind(value)
+        except (TypeError, ValueError):
+            raise RuntimeError(f'Invalid value for {env_var} / "{cfg_key}": {value!r}')
+    return connection_string, options
+
+
+def get_client():
+    """Return the shared MongoClient, creating it on first use.
+
+    MongoClient is thread-safe and pools its own connections, so one client
+    serves every manager and thread in the process. pymongo is imported here
+    rather than at module level, and creating the client does not block:
+    sockets are opened by the first operation that needs one.
+    """
+    global _client
+    with _lock:
+        if _client is None:
+            from pymongo import MongoClient
+            connection_string, options = connection_settings()
+            _client = MongoClient(connection_string, **options)
+        return _client
+
+
+def close_client():
+    """Close the shared client. The next get_client() opens a new one."""
+    global _client
+    with _lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+atexit.register(close_client)
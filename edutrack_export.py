@@ -0,0 +1,158 @@
+# edutrack_export.py
+"""Streaming CSV/JSONL export of EduTrack collections.
+
+Records are read from a server-side cursor in batches, references are
+resolved once per batch and each row is written as soon as it is built, so
+memory stays flat however many rows there are.
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import os
+import sys
+import time
+from datetime import date
+
+from bson import ObjectId
+
+from edutrack_manager import EduTrackManager, _chunked
+
+
+# kind -> (manager iterator, projection, references added per batch, output columns)
+EXPORT_KINDS = {
+    "results": (
+        "iter_results",
+        {"student_id": 1, "exam_id": 1, "subject_id": 1, "score": 1, "grade": 1, "remarks": 1, "created_at": 1},
+        [],  # iter_results adds admission_number, exam_name and subject_code itself
+        ["_id", "admission_number", "exam_name", "subject_code", "score", "grade", "remarks", "created_at"],
+    ),
+    "attendance": (
+        "iter_attendance",
+        {"student_id": 1, "date": 1, "status": 1, "created_at": 1},
+        [],  # iter_attendance adds admission_number itself
+        ["_id", "admission_number", "date", "status", "created_at"],
+    ),
+    "students": (
+        "iter_students",
+        None,
+        [("class_id", "class", "class_name")],
+        ["_id", "admission_number", "first_name", "last_name", "gender", "date_of_birth", "class_name",
+         "parent_phone", "created_at"],
+    ),
+    "teachers": (
+        "iter_teachers",
+        None,
+        [],
+        ["_id", "employee_number", "first_name", "last_name", "phone", "email", "department", "created_at"],
+    ),
+}
+
+FORMATS = ("csv", "jsonl")
+
+
+def _plain(value):
+    """JSON/CSV-friendly form of a BSON value."""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def iter_rows(manager, kind, batch_size=1000):
+    """Yield export rows (dicts keyed by the kind's columns) in _id order."""
+    method, projection, references, columns = EXPORT_KINDS[kind]
+    docs = getattr(manager, method)(batch_size=batch_size, projection=projection)
+    for batch in _chunked(docs, batch_size):
+        if references:
+            manager._add_references(batch, references)
+        for doc in batch:
+            yield {column: _plain(doc.get(column)) for column in columns}
+
+
+def _open(path, compress):
+    if path == "-":
+        return sys.stdout
+    if compress:
+        return gzip.open(path, "wt", encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def export(manager, kind, path, fmt="csv", compress=False, batch_size=1000, progress_every=100000):
+    """Stream one collection to path ("-" for stdout).
+
+    Rows go to path + ".part", which replaces path only when the export
+    finishes, so a failed export leaves any existing file untouched. Prints a progress line every progress_every rows and returns
+    {"kind", "path", "rows", "seconds", "rows_per_second", "bytes"}.
+    """
+    if kind not in EXPORT_KINDS:
+        raise ValueError(f"Unknown export kind {kind!r}; pass one of: {', '.join(EXPORT_KINDS)}")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}; pass one of: {', '.join(FORMATS)}")
+    columns = EXPORT_KINDS[kind][3]
+
+    started = time.perf_counter()
+    rows = 0
+    partial = path + ".part" if path != "-" else path
+    out = _open(partial, compress)
+    done = False
+    try:
+        if fmt == "csv":
+            writer = csv.DictWriter(out, fieldnames=columns)
+            writer.writeheader()
+            write = writer.writerow
+        else:
+            def write(row):
+                out.write(json.dumps(row, ensure_ascii=False, default=str))
+                out.write("\n")
+        for row in iter_rows(manager, kind, batch_size):
+            write(row)
+            rows += 1
+            if progress_every and rows % progress_every == 0:
+                print(f"  {rows} rows written ({rows / (time.perf_counter() - started):.0f} rows/s)", file=sys.stderr)
+        done = True
+    finally:
+        if out is not sys.stdout:
+            out.close()
+            if done:
+                os.replace(partial, path)
+            else:
+                os.remove(partial)
+
+    seconds = time.perf_counter() - started
+    return {
+        "kind": kind,
+        "path": path,
+        "rows": rows,
+        "seconds": seconds,
+        "rows_per_second": rows / seconds if seconds else 0.0,
+        "bytes": os.path.getsize(path) if path != "-" else None,
+    }
+
+
+def print_summary(summary):
+    size = f", {summary['bytes'] / 1024:.1f} KiB" if summary["bytes"] is not None else ""
+    print(f"\n Exported {summary['rows']} {summary['kind']} to {summary['path']} in {summary['seconds']:.1f}s "
+          f"({summary['rows_per_second']:.0f} rows/s{size})", file=sys.stderr)
+
+
+def main(argv=None):
+    """Entry point for `main.py export <kind> [--format csv|jsonl] [--gzip] [-o FILE]`."""
+    parser = argparse.ArgumentParser(prog="main.py export", description="Export EduTrack data as CSV or JSON lines.")
+    parser.add_argument("kind", choices=sorted(EXPORT_KINDS))
+    parser.add_argument("--format", choices=FORMATS, default="csv", help="output format (default csv)")
+    parser.add_argument("--gzip", action="store_true", help="gzip the output file")
+    parser.add_argument("-o", "--output", help="output file, or - for stdout (default: <kind>.<format>[.gz])")
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows fetched and resolved per batch (default 1000)")
+    args = parser.parse_args(argv)
+
+    path = args.output or f"{args.kind}.{args.format}" + (".gz" if args.gzip else "")
+    manager = EduTrackManager(output="silent")
+    try:
+        summary = export(manager, args.kind, path, args.format, args.gzip and path != "-", args.batch_size)
+    finally:
+        manager.close_connection()
+    print_summary(summary)
+    return 0
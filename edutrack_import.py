@@ -0,0 +1,208 @@
+# edutrack_import.py
+"""Streaming CSV/XLSX import into EduTrack through the manager's bulk APIs.
+
+Column headers must match the keyword arguments of the matching
+single-record method (e.g. a students file has admission_number,
+first_name, last_name, gender, date_of_birth, class_id, parent_phone).
+Rows are read, validated and written one chunk at a time, so memory stays
+flat however large the file is.
+"""
+
+import argparse
+import csv
+import os
+import time
+from datetime import date, datetime
+
+from edutrack_manager import EduTrackManager, _chunked
+
+
+ATTENDANCE_STATUSES = ("Present", "Absent", "Late")
+
+# Bad rows kept in the summary; the rest are only counted
+MAX_STORED_ERRORS = 100
+
+
+def _parse_date(value):
+    """Date from an ISO string (YYYY-MM-DD) or a spreadsheet date cell."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _parse_score(value):
+    """Numeric score; whole numbers stay ints."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    score = float(value)
+    return int(score) if score.is_integer() else score
+
+
+def _parse_status(value):
+    status = str(value).capitalize()
+    if status not in ATTENDANCE_STATUSES:
+        raise ValueError(f"expected one of {', '.join(ATTENDANCE_STATUSES)}")
+    return status
+
+
+# kind -> (manager bulk method, {column: converter})
+IMPORT_KINDS = {
+    "teachers": ("add_teachers_bulk", {}),
+    "classes": ("add_classes_bulk", {}),
+    "students": ("add_students_bulk", {"date_of_birth": _parse_date}),
+    "subjects": ("add_subjects_bulk", {}),
+    "exams": ("add_exams_bulk", {"exam_date": _parse_date}),
+    "attendance": ("record_attendance_bulk", {"attendance_date": _parse_date, "status": _parse_status}),
+    "results": ("record_results_bulk", {"score": _parse_score}),
+}
+
+# Kinds written as upserts on their unique keys, so re-importing a
+# corrected file updates rows instead of failing on duplicates
+UPSERT_KINDS = ("attendance", "results")
+
+
+def kind_from_path(path):
+    """Record kind named by a file such as students.csv or results_2024.csv.
+
+    The stem must be a kind name, optionally followed by "_" and a suffix;
+    anything else (exam_results.csv, class_register.xlsx) returns None so
+    the caller asks for --kind rather than guessing wrong.
+    """
+    stem = os.path.splitext(os.path.basename(path))[0].lower()
+    kind = stem.split("_", 1)[0]
+    return kind if kind in IMPORT_KINDS else None
+
+
+def read_rows(path):
+    """Yield (line number, row dict) from a CSV or XLSX file, one row at a time.
+
+    Empty cells become None and text is stripped. XLSX needs openpyxl.
+    """
+    if path.lower().endswith((".xlsx", ".xlsm")):
+        yield from _read_xlsx(path)
+        return
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            yield reader.line_num, _clean(row)
+
+
+def _read_xlsx(path):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise RuntimeError("Reading .xlsx files needs openpyxl (pip install openpyxl)")
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(h).strip() if h is not None else "" for h in next(rows, ())]
+        for line, values in enumerate(rows, start=2):
+            if values and any(v not in (None, "") for v in values):
+                yield line, _clean(dict(zip(header, values)))
+    finally:
+        workbook.close()
+
+
+def _clean(row):
+    cleaned = {}
+    for key, value in row.items():
+        if not key:
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+        cleaned[key.strip()] = None if value == "" else value
+    return cleaned
+
+
+def _convert(row, converters):
+    """Apply column converters in place; return an error message or None."""
+    for column, convert in converters.items():
+        if row.get(column) is None:
+            continue
+        try:
+            row[column] = convert(row[column])
+        except (TypeError, ValueError) as e:
+            return f"Invalid {column} {row[column]!r}: {e}"
+    return None
+
+
+def import_file(manager, path, kind=None, chunk_size=1000, max_errors=MAX_STORED_ERRORS, progress_every=10):
+    """Stream a CSV/XLSX file into EduTrack.
+
+    Each chunk of rows is converted, then written with the kind's *_bulk
+    method (identifiers resolved once per chunk, one unordered write).
+    Attendance and results are upserted, so a file can be imported again.
+    Prints a progress line every progress_every chunks and returns a summary:
+    {"kind", "rows", "imported", "failed", "errors", "seconds", "rows_per_second"}
+    where errors holds at most max_errors {"line", "error"} entries.
+    """
+    kind = kind or kind_from_path(path)
+    if kind not in IMPORT_KINDS:
+        raise ValueError(f"Cannot tell the record kind of {path!r} from its name; "
+                         f"pass --kind (one of: {', '.join(IMPORT_KINDS)})")
+    method, converters = IMPORT_KINDS[kind]
+    bulk = getattr(manager, method)
+    options = {"upsert": True} if kind in UPSERT_KINDS else {}
+
+    summary = {"kind": kind, "rows": 0, "imported": 0, "failed": 0, "errors": []}
+
+    def bad_row(line, error):
+        summary["failed"] += 1
+        if len(summary["errors"]) < max_errors:
+            summary["errors"].append({"line": line, "error": error})
+
+    started = time.perf_counter()
+    for n, chunk in enumerate(_chunked(read_rows(path), chunk_size), start=1):
+        records, lines = [], []
+        for line, row in chunk:
+            error = _convert(row, converters)
+            if error:
+                bad_row(line, error)
+            else:
+                records.append(row)
+                lines.append(line)
+        summary["rows"] += len(chunk)
+
+        for report in bulk(records, chunk_size=chunk_size, **options) if records else []:
+            if report["ok"]:
+                summary["imported"] += 1
+            else:
+                bad_row(lines[report["row"]], report["error"])
+
+        if progress_every and n % progress_every == 0:
+            elapsed = time.perf_counter() - started
+            print(f"  {summary['rows']} rows read, {summary['imported']} imported ({summary['rows'] / elapsed:.0f} rows/s)")
+
+    summary["seconds"] = time.perf_counter() - started
+    summary["rows_per_second"] = summary["rows"] / summary["seconds"] if summary["seconds"] else 0.0
+    return summary
+
+
+def print_summary(summary):
+    print(f"\n Import {summary['kind']}: {summary['imported']} imported, {summary['failed']} failed "
+          f"of {summary['rows']} rows in {summary['seconds']:.1f}s ({summary['rows_per_second']:.0f} rows/s)")
+    for err in summary["errors"]:
+        print(f"  • line {err['line']}: {err['error']}")
+    hidden = summary["failed"] - len(summary["errors"])
+    if hidden > 0:
+        print(f"  ... and {hidden} more bad rows")
+
+
+def main(argv=None):
+    """Entry point for `main.py import <file> [--kind KIND] [--chunk-size N]`."""
+    parser = argparse.ArgumentParser(prog="main.py import", description="Import a CSV or XLSX file into EduTrack.")
+    parser.add_argument("path", help="CSV or XLSX file with a header row")
+    parser.add_argument("--kind", choices=sorted(IMPORT_KINDS), help="record kind (default: guessed from the file name)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="rows per bulk write (default 1000)")
+    parser.add_argument("--max-errors", type=int, default=MAX_STORED_ERRORS, help="bad rows to list (default 100)")
+    args = parser.parse_args(argv)
+
+    manager = EduTrackManager(output="silent")
+    try:
+        summary = import_file(manager, args.path, kind=args.kind, chunk_size=args.chunk_size, max_errors=args.max_errors)
+    finally:
+        manager.close_connection()
+    print_summary(summary)
+    return 0 if summary["failed"] == 0 else 1
@@ -1,47 +1,323 @@
 # edutrack_manager.py
 """EduTrack manager: simple CRUD helpers for the Edutrack MongoDB database."""
 
-from pymongo import MongoClient
-from bson import ObjectId
+import time
+from bisect import bisect_right
+from itertools import islice
+
 from datetime import datetime, date
 
+from edutrack_cache import NATURAL_KEYS, REFERENCE_COLLECTIONS, IdentifierResolver, ReferenceCache
+from edutrack_connection import connection_settings, get_client
+
+
+# Indexes backing every lookup the manager makes by natural key or by
+# reference: (collection, keys, options). Exam names are only unique per
+# class in practice, so that index is not unique. One attendance record per
+# student per day, and one result per student/exam/subject, let those
+# writes upsert.
+INDEX_SPECS = [
+    ("teachers", [("employee_number", 1)], {"unique": True}),
+    ("classes", [("name", 1)], {"unique": True}),
+    ("students", [("admission_number", 1)], {"unique": True}),
+    ("students", [("class_id", 1)], {}),
+    ("subjects", [("code", 1)], {"unique": True}),
+    ("exams", [("name", 1)], {}),
+    ("exams", [("class_id", 1)], {}),
+    ("attendance", [("student_id", 1), ("date", 1)], {"unique": True}),
+    ("attendance_summaries", [("student_id", 1), ("term", 1)], {"unique": True}),
+    ("result_stats", [("scope", 1), ("key", 1)], {"unique": True}),
+    ("results", [("student_id", 1), ("exam_id", 1), ("subject_id", 1)], {"unique": True}),
+    ("results", [("exam_id", 1), ("subject_id", 1)], {}),
+]
+
+# attendance status -> counter field in attendance_summaries
+ATTENDANCE_STATUS_FIELDS = {"Present": "present", "Absent": "absent", "Late": "late"}
+
+# result_stats scope -> the results field it groups by
+RESULT_STAT_SCOPES = {"student": "student_id", "exam": "exam_id", "subject": "subject_id"}
+
+# Collections counted by get_database_stats
+STATS_COLLECTIONS = ("students", "teachers", "classes", "subjects", "attendance", "exams", "results")
+
+# Default projections for listing methods: only the fields they display
+# (plus the references they resolve). Pass projection=None for full documents.
+LIST_PROJECTIONS = {
+    "teachers": {"employee_number": 1, "first_name": 1, "last_name": 1, "department": 1},
+    "classes": {"name": 1, "form": 1},
+    "students": {"admission_number": 1, "first_name": 1, "last_name": 1},
+    "subjects": {"name": 1, "code": 1},
+    "exams": {"name": 1, "date": 1},
+    "attendance": {"student_id": 1, "date": 1, "status": 1},
+    "results": {"student_id": 1, "exam_id": 1, "subject_id": 1, "score": 1, "grade": 1},
+}
+
+def _index_entry(coll_name, keys, options):
+    """Report entry for one INDEX_SPECS row; _check_index fills in its status."""
+    index_name = "_".join(f"{field}_{direction}" for field, direction in keys)
+    return {"collection": coll_name, "index": index_name, "unique": bool(options.get("unique"))}
+
+
+def _check_index(entry, existing):
+    """Set entry's status from the collection's index_information().
+
+    Returns False when the index is missing and should be created.
+    """
+    info = existing.get(entry["index"])
+    if info is None:
+        return False
+    if bool(info.get("unique")) != entry["unique"]:
+        # same keys, different options: create_index would fail
+        entry["status"] = "conflict"
+        entry["error"] = "exists with different options; drop it and re-run to rebuild"
+    else:
+        entry["status"] = "exists"
+    return True
+
+
+def _chunked(iterable, size):
+    """Yield lists of at most `size` items from any iterable."""
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class GradeScale:
+    """Letter grades from score cut-offs.
+
+    cutoffs is a sequence of (minimum score, grade) pairs; a score gets the
+    grade of the highest cut-off it reaches, or fail_grade below all of them.
+    """
+
+    def __init__(self, cutoffs=((90, "A"), (80, "B"), (70, "C"), (60, "D")), fail_grade="F"):
+        pairs = sorted(cutoffs)
+        self.cutoffs = tuple(pairs)
+        self.fail_grade = fail_grade
+        self._bounds = [bound for bound, _ in pairs]
+        self._grades = [fail_grade] + [grade for _, grade in pairs]
+
+    def grade(self, score):
+        """Grade one score."""
+        return self._grades[bisect_right(self._bounds, score)]
+
+    def grade_many(self, scores):
+        """Grade a sequence of scores in one call (binary search per score)."""
+        bounds, grades = self._bounds, self._grades
+        return [grades[bisect_right(bounds, score)] for score in scores]
+
+    def switch_expression(self, field="$score"):
+        """Aggregation $switch that grades `field` server-side with this scale."""
+        return {"$switch": {
+            "branches": [{"case": {"$gte": [field, bound]}, "then": grade}
+                         for bound, grade in reversed(self.cutoffs)],
+            "default": self.fail_grade
+        }}
+
+
+DEFAULT_GRADE_SCALE = GradeScale()
 
 
 class EduTrackManager:
     """Manager for EduTrack data stored in MongoDB."""
     
-    def __init__(self):
-        """Connect to MongoDB using env or local config.json."""
-        # Load MongoDB connection string from environment or local config
-        # - Preferred: set environment variable `EDUTRACK_MONGODB_URI`
-        # - Fallback: create a local `config.json` (not committed) with {"mongodb_uri": "<uri>"}
-        import os, json
-        connection_string = os.environ.get('EDUTRACK_MONGODB_URI')
-        if not connection_string:
-            cfg_path = os.path.join(os.path.dirname(__file__), 'config.json')
-            if os.path.exists(cfg_path):
-                try:
-                    with open(cfg_path, 'r', encoding='utf-8') as f:
-                        cfg = json.load(f)
-                        connection_string = cfg.get('mongodb_uri')
-                except Exception:
-                    connection_string = None
+    def __init__(self, grade_scale=None, output="print", client=None, cache_ttl=300):
+        """Set up a manager for the database configured in env or config.json.
+
+        No connection is made here: the client is created (or borrowed from
+        edutrack_connection's shared pool) on the first query. A missing
+        connection string still raises RuntimeError immediately. Pass client
+        to use a specific MongoClient instead of the shared one.
+
+        grade_scale is the GradeScale used when recording results; defaults
+        to the standard A-F scale.
 
-        if not connection_string:
-            raise RuntimeError('MongoDB connection string not found. Set EDUTRACK_MONGODB_URI env var or create config.json with {"mongodb_uri": "<uri>"}.')
+        output selects where status messages and listings go:
+          "print"   - stdout (default, used by the CLI)
+          "silent"  - nowhere (also None); methods only return data
+          "logging" - the "edutrack" logger at INFO level
+          "buffer"  - appended to self.output_buffer
+          callable  - called with each message
+        With "silent", per-row listing output is skipped entirely.
 
+        cache_ttl is how many seconds teachers, classes, subjects and exams
+        read through the reference cache are reused (see ReferenceCache).
+        """
+        self.grade_scale = grade_scale or DEFAULT_GRADE_SCALE
+        self.output_buffer = []
+        if output == "print":
+            self._emit = print
+        elif output in (None, "silent"):
+            self._emit = None
+        elif output == "logging":
+            import logging
+            self._emit = logging.getLogger("edutrack").info
+        elif output == "buffer":
+            self._emit = self.output_buffer.append
+        elif callable(output):
+            self._emit = output
+        else:
+            raise ValueError(f"Unknown output mode: {output!r}")
+        # Connection string and pool settings come from the environment or a
+        # local config.json (not committed); see edutrack_connection.
+        if client is None:
+            connection_settings()  # fail fast on missing/invalid configuration
+        self._client = client
+        self._db = None
+        self._resolver = None
+        self.cache_ttl = cache_ttl
+        self._reference_cache = None
+        # mode -> (monotonic timestamp, counts) for get_database_stats(max_age=...)
+        self._stats_cache = {}
+        self._attendance_buffer = None
+
+    @property
+    def client(self):
+        """The MongoClient, created on first use."""
+        if self._client is None:
+            self._client = get_client()
+        return self._client
+
+    @property
+    def db(self):
+        """The edutrack database; connects on first use."""
+        if self._db is None:
+            self._db = self.client.edutrack
+        return self._db
+
+    @property
+    def resolver(self):
+        """Shared natural-key -> ObjectId cache for the id-or-key fallbacks."""
+        if self._resolver is None:
+            self._resolver = IdentifierResolver(self.db)
+        return self._resolver
+
+    @property
+    def reference_cache(self):
+        """Read-through TTL cache for teachers, classes, subjects and exams."""
+        if self._reference_cache is None:
+            self._reference_cache = ReferenceCache(self.db, ttl=self.cache_ttl)
+        return self._reference_cache
+
+    def warm_reference_cache(self):
+        """Load all reference data into the cache; returns the document count.
+
+        Quiet on purpose: the CLI runs it in the background at startup.
+        """
         try:
-            self.client = MongoClient(connection_string)
-            self.db = self.client.edutrack
-            
-            # Test connection
-            self.client.admin.command('ping')
-            print(" Connected to MongoDB Atlas successfully!")
-            
-        except Exception as e:
-            print(f" Connection failed: {e}")
-            raise
+            return self.reference_cache.warm()
+        except Exception:
+            return None
+
+    def cache_stats(self):
+        """Hit/miss counters for the reference and identifier caches."""
+        return {
+            "reference": self.reference_cache.stats(),
+            "identifiers": self.resolver.stats(),
+        }
+
+    def _invalidate(self, kind, identifier=None):
+        """Drop cached lookups for a record this manager just changed."""
+        if self._resolver is not None:
+            self._resolver.invalidate(kind, identifier)
+        if self._reference_cache is not None:
+            self._reference_cache.invalidate(kind, identifier)
+
+    def _reference(self, kind, identifier, projection=None):
+        """A teacher/class/subject/exam by id or natural key, via the reference cache."""
+        oid = self.resolver.resolve(kind, identifier)
+        doc = self.reference_cache.get(kind, oid) if oid else None
+        return self._project(doc, projection) if doc else None
+
+    def _reference_page(self, kind, after=None, limit=None, projection=None):
+        """A keyset page of a reference collection, served from the cache."""
+        return [self._project(doc, projection) for doc in self.reference_cache.page(kind, after, limit)]
+
+    @staticmethod
+    def _project(doc, projection):
+        """Apply a find()-style projection to a cached document."""
+        if not projection:
+            return doc
+        if any(projection.get(f) for f in projection if f != "_id"):
+            keep = {f for f, on in projection.items() if on}
+            if projection.get("_id", 1):
+                keep.add("_id")
+            return {f: v for f, v in doc.items() if f in keep}
+        return {f: v for f, v in doc.items() if projection.get(f, 1)}
+
+    def ping(self):
+        """Round-trip to the server; returns the elapsed time in seconds."""
+        started = time.perf_counter()
+        self.client.admin.command('ping')
+        return time.perf_counter() - started
     
+    @property
+    def verbose(self):
+        """True when messages go somewhere, i.e. formatting them is worthwhile."""
+        return self._emit is not None
+
+    def _say(self, message):
+        """Send a status message to the configured output."""
+        if self._emit is not None:
+            self._emit(message)
+
+    # Indexes
+
+    def ensure_indexes(self):
+        """Create any missing indexes from INDEX_SPECS and report what happened.
+
+        Also fills attendance_summaries and result_stats if they are still
+        empty on a database that already holds attendance or results (see
+        ensure_summaries).
+        """
+        report = []
+        existing = {}
+        for coll_name, keys, options in INDEX_SPECS:
+            entry = _index_entry(coll_name, keys, options)
+            try:
+                if coll_name not in existing:
+                    existing[coll_name] = self.db[coll_name].index_information()
+                if not _check_index(entry, existing[coll_name]):
+                    self.db[coll_name].create_index(keys, name=entry["index"], **options)
+                    entry["status"] = "created"
+            except Exception as e:
+                # e.g. duplicate natural keys already stored block a unique index
+                entry["status"] = "failed"
+                entry["error"] = str(e)
+            report.append(entry)
+
+        self._say("\n Index report:")
+        for entry in report:
+            unique = " (unique)" if entry["unique"] else ""
+            line = f"  • {entry['collection']}.{entry['index']}{unique}: {entry['status']}"
+            if "error" in entry:
+                line += f" - {entry['error']}"
+            self._say(line)
+        self.ensure_summaries()
+        return report
+
+    def ensure_summaries(self):
+        """Rebuild derived collections that are empty while their source is not.
+
+        Databases created before attendance_summaries and result_stats
+        existed have data but no summaries, so summary reads find nothing
+        until they are built once. Returns the names of the rebuilt
+        collections.
+        """
+        rebuilt = []
+        for derived, source, rebuild in (("attendance_summaries", "attendance", self.rebuild_attendance_summaries),
+                                         ("result_stats", "results", self.rebuild_result_stats)):
+            try:
+                if not self.db[derived].estimated_document_count() and self.db[source].estimated_document_count():
+                    self._say(f" {derived} is empty; building it from {source}")
+                    if rebuild() is not None:
+                        rebuilt.append(derived)
+            except Exception as e:
+                self._say(f" Error checking {derived}: {e}")
+        return rebuilt
+
     # Teachers
     
     def add_teacher(self, employee_number, first_name, last_name, phone, email, department):
@@ -58,52 +334,55 @@ class EduTrackManager:
             }
             
             result = self.db.teachers.insert_one(teacher_document)
-            print(f" Teacher '{first_name} {last_name}' added with ID: {result.inserted_id}")
+            self.reference_cache.invalidate_listing("teacher")
+            self._say(f" Teacher '{first_name} {last_name}' added with ID: {result.inserted_id}")
             return str(result.inserted_id)
             
         except Exception as e:
-            print(f" Error adding teacher: {e}")
+            self._say(f" Error adding teacher: {e}")
             return None
     
-    def get_all_teachers(self):
-        """List all teachers."""
+    def iter_teachers(self, query=None, after=None, limit=None, batch_size=500, projection=None):
+        """Stream teachers in _id order without loading the collection."""
+        yield from self._keyset_cursor(self.db.teachers, query, after, limit, batch_size, projection)
+
+    def get_all_teachers(self, limit=None, after=None, projection=LIST_PROJECTIONS["teachers"]):
+        """List teachers. Pass limit/after to fetch one page (see _keyset_cursor)."""
         try:
-            teachers = list(self.db.teachers.find())
+            teachers = self._reference_page("teacher", after, limit, projection)
             if teachers:
-                print(f"\n Total Teachers: {len(teachers)}")
-                for teacher in teachers:
-                    print(f"  • {teacher['first_name']} {teacher['last_name']} - {teacher['department']} ({teacher['employee_number']})")
+                self._say(self._listing_header("Teachers", len(teachers), limit))
+                if self.verbose:
+                    for teacher in teachers:
+                        self._say(f"  • {teacher['first_name']} {teacher['last_name']} - {teacher['department']} ({teacher['employee_number']})")
                 return teachers
             else:
-                print("No teachers found")
+                self._say("No teachers found")
                 return []
         except Exception as e:
-            print(f" Error getting teachers: {e}")
+            self._say(f" Error getting teachers: {e}")
             return []
     
-    def get_teacher(self, teacher_id):
+    def get_teacher(self, teacher_id, projection=None):
         """Get a teacher by ObjectId or employee number."""
         try:
-            try:
-                filter_q = {"_id": ObjectId(teacher_id)}
-            except Exception:
-                filter_q = {"employee_number": teacher_id}
-            teacher = self.db.teachers.find_one(filter_q)
+            teacher = self._reference("teacher", teacher_id, projection)
             if teacher:
-                print(f"\n Teacher: {teacher['first_name']} {teacher['last_name']}")
-                print(f"   Department: {teacher['department']}")
-                print(f"   Phone: {teacher['phone']}")
-                print(f"   Email: {teacher['email']}")
+                self._say(f"\n Teacher: {teacher.get('first_name')} {teacher.get('last_name')}")
+                self._say(f"   Department: {teacher.get('department')}")
+                self._say(f"   Phone: {teacher.get('phone')}")
+                self._say(f"   Email: {teacher.get('email')}")
                 return teacher
             else:
-                print(f"Teacher with ID {teacher_id} not found")
+                self._say(f"Teacher with ID {teacher_id} not found")
                 return None
         except Exception as e:
-            print(f" Error getting teacher: {e}")
+            self._say(f" Error getting teacher: {e}")
             return None
     
     def update_teacher(self, teacher_id, **kwargs):
         """Update a teacher's details."""
+        from bson import ObjectId
         try:
             update_data = {k: v for k, v in kwargs.items() if v is not None}
             try:
@@ -111,18 +390,20 @@ class EduTrackManager:
             except Exception:
                 filter_q = {"employee_number": teacher_id}
             result = self.db.teachers.update_one(filter_q, {"$set": update_data})
+            self._invalidate("teacher", teacher_id)
             if result.modified_count > 0:
-                print(f" Teacher updated successfully")
+                self._say(f" Teacher updated successfully")
                 return True
             else:
-                print("No teacher found to update")
+                self._say("No teacher found to update")
                 return False
         except Exception as e:
-            print(f" Error updating teacher: {e}")
+            self._say(f" Error updating teacher: {e}")
             return False
     
     def delete_teacher(self, teacher_id):
         """Remove a teacher by id or employee number."""
+        from bson import ObjectId
         try:
             # Build OR filters: try to remove by ObjectId and by employee_number (trimmed)
             filters = []
@@ -133,20 +414,22 @@ class EduTrackManager:
             filters.append({"employee_number": teacher_id.strip()})
 
             result = self.db.teachers.delete_many({"$or": filters})
+            self._invalidate("teacher", teacher_id)
             if result.deleted_count > 0:
-                print(f" Teacher deleted successfully (removed {result.deleted_count})")
+                self._say(f" Teacher deleted successfully (removed {result.deleted_count})")
                 return True
             else:
-                print("No teacher found to delete")
+                self._say("No teacher found to delete")
                 return False
         except Exception as e:
-            print(f" Error deleting teacher: {e}")
+            self._say(f" Error deleting teacher: {e}")
             return False
     
     # Classes
     
     def add_class(self, class_name, form, class_teacher_id=None):
         """Create a class record."""
+        from bson import ObjectId
         try:
             class_document = {
                 "name": class_name,
@@ -156,45 +439,47 @@ class EduTrackManager:
             }
             
             result = self.db.classes.insert_one(class_document)
-            print(f" Class '{class_name}' added with ID: {result.inserted_id}")
+            self.reference_cache.invalidate_listing("class")
+            self._say(f" Class '{class_name}' added with ID: {result.inserted_id}")
             return str(result.inserted_id)
             
         except Exception as e:
-            print(f"Error adding class: {e}")
+            self._say(f"Error adding class: {e}")
             return None
     
-    def get_all_classes(self):
-        """List all classes."""
+    def iter_classes(self, query=None, after=None, limit=None, batch_size=500, projection=None):
+        """Stream classes in _id order without loading the collection."""
+        yield from self._keyset_cursor(self.db.classes, query, after, limit, batch_size, projection)
+
+    def get_all_classes(self, limit=None, after=None, projection=LIST_PROJECTIONS["classes"]):
+        """List classes. Pass limit/after to fetch one page (see _keyset_cursor)."""
         try:
-            classes = list(self.db.classes.find())
+            classes = self._reference_page("class", after, limit, projection)
             if classes:
-                print(f"\n Total Classes: {len(classes)}")
-                for cls in classes:
-                    print(f"  • {cls['name']} ({cls['form']})")
+                self._say(self._listing_header("Classes", len(classes), limit))
+                if self.verbose:
+                    for cls in classes:
+                        self._say(f"  • {cls['name']} ({cls['form']})")
                 return classes
             else:
-                print("No classes found")
+                self._say("No classes found")
                 return []
         except Exception as e:
-            print(f" Error getting classes: {e}")
+            self._say(f" Error getting classes: {e}")
             return []
     
-    def get_class(self, class_id):
+    def get_class(self, class_id, projection=None):
         """Get a class by id or name."""
         try:
-            try:
-                filter_q = {"_id": ObjectId(class_id)}
-            except Exception:
-                filter_q = {"name": class_id}
-            cls = self.db.classes.find_one(filter_q)
+            cls = self._reference("class", class_id, projection)
             if cls:
-                print(f"\n Class: {cls['name']} ({cls['form']})")
+                self._say(f"\n Class: {cls.get('name')} ({cls.get('form')})")
                 return cls
             else:
-                print(f"Class with ID {class_id} not found")
+                self._say(f"Class with ID {class_id} not found")
                 return None
         except Exception as e:
-            print(f" Error getting class: {e}")
+            self._say(f" Error getting class: {e}")
             return None
     
     # Students
@@ -209,15 +494,10 @@ class EduTrackManager:
             # Resolve class_id: accept ObjectId or class name
             class_obj_id = None
             if class_id:
-                try:
-                    class_obj_id = ObjectId(class_id)
-                except Exception:
-                    cls = self.db.classes.find_one({"name": class_id})
-                    if cls:
-                        class_obj_id = cls['_id']
-                    else:
-                        print(f" Class with identifier {class_id} not found")
-                        return None
+                class_obj_id = self.resolver.resolve("class", class_id)
+                if not class_obj_id:
+                    self._say(f" Class with identifier {class_id} not found")
+                    return None
             
             student_document = {
                 "admission_number": admission_number,
@@ -231,77 +511,81 @@ class EduTrackManager:
             }
             
             result = self.db.students.insert_one(student_document)
-            print(f" Student '{first_name} {last_name}' added with ID: {result.inserted_id}")
+            self._say(f" Student '{first_name} {last_name}' added with ID: {result.inserted_id}")
             return str(result.inserted_id)
             
         except Exception as e:
-            print(f" Error adding student: {e}")
+            self._say(f" Error adding student: {e}")
             return None
     
-    def get_all_students(self):
-        """List all students."""
+    def iter_students(self, query=None, after=None, limit=None, batch_size=500, projection=None):
+        """Stream students in _id order without loading the collection."""
+        yield from self._keyset_cursor(self.db.students, query, after, limit, batch_size, projection)
+
+    def get_all_students(self, limit=None, after=None, projection=LIST_PROJECTIONS["students"]):
+        """List students. Pass limit/after to fetch one page (see _keyset_cursor)."""
         try:
-            students = list(self.db.students.find())
+            students = list(self.iter_students(after=after, limit=limit, projection=projection))
             if students:
-                print(f"\n Total Students: {len(students)}")
-                for student in students:
-                    print(f"  • {student['first_name']} {student['last_name']} ({student['admission_number']})")
+                self._say(self._listing_header("Students", len(students), limit))
+                if self.verbose:
+                    for student in students:
+                        self._say(f"  • {student['first_name']} {student['last_name']} ({student['admission_number']})")
                 return students
             else:
-                print("No students found")
+                self._say("No students found")
                 return []
         except Exception as e:
-            print(f" Error getting students: {e}")
+            self._say(f" Error getting students: {e}")
             return []
     
-    def get_student(self, student_id):
+    def get_student(self, student_id, projection=None):
         """Get a student by id or admission number."""
+        from bson import ObjectId
         try:
             try:
                 filter_q = {"_id": ObjectId(student_id)}
             except Exception:
                 filter_q = {"admission_number": student_id}
-            student = self.db.students.find_one(filter_q)
+            student = self.db.students.find_one(filter_q, projection)
             if student:
-                print(f"\n Student: {student['first_name']} {student['last_name']}")
-                print(f"   Admission: {student['admission_number']}")
-                print(f"   Gender: {student['gender']}")
-                print(f"   DOB: {student['date_of_birth']}")
+                self._say(f"\n Student: {student.get('first_name')} {student.get('last_name')}")
+                self._say(f"   Admission: {student.get('admission_number')}")
+                self._say(f"   Gender: {student.get('gender')}")
+                self._say(f"   DOB: {student.get('date_of_birth')}")
                 return student
             else:
-                print(f"Student with ID {student_id} not found")
+                self._say(f"Student with ID {student_id} not found")
                 return None
         except Exception as e:
-            print(f" Error getting student: {e}")
+            self._say(f" Error getting student: {e}")
             return None
     
-    def get_students_by_class(self, class_id):
+    def get_students_by_class(self, class_id, projection=LIST_PROJECTIONS["students"]):
         """List students in a class. Accepts class id or name."""
         try:
             # class_id may be an ObjectId string or class name; resolve accordingly
-            try:
-                cls_obj_id = ObjectId(class_id)
-            except Exception:
-                cls = self.db.classes.find_one({"name": class_id})
-                if not cls:
-                    print(f"Class with identifier {class_id} not found")
-                    return []
-                cls_obj_id = cls['_id']
-            students = list(self.db.students.find({"class_id": cls_obj_id}))
+            cls_obj_id = self.resolver.resolve("class", class_id)
+            if not cls_obj_id:
+                self._say(f"Class with identifier {class_id} not found")
+                return []
+            students = list(self.db.students.find({"class_id": cls_obj_id}, projection))
             if students:
-                print(f"\n Students in Class: {len(students)}")
-                for student in students:
-                    print(f"  • {student['first_name']} {student['last_name']} ({student['admission_number']})")
+                self._say(f"\n Students in Class: {len(students)}")
+                if self.verbose:
+                    for student in students:
+                        self._say(f"  • {student['first_name']} {student['last_name']} ({student['admission_number']})")
                 return students
             else:
-                print("No students found in this class")
+                self._say("No students found in this class")
                 return []
         except Exception as e:
-            print(f" Error getting students: {e}")
+            self._say(f" Error getting students: {e}")
             return []
     
     def update_student(self, student_id, **kwargs):
         """Update a student's details."""
+        from bson import ObjectId
         try:
             update_data = {k: v for k, v in kwargs.items() if v is not None}
             try:
@@ -309,18 +593,20 @@ class EduTrackManager:
             except Exception:
                 filter_q = {"admission_number": student_id}
             result = self.db.students.update_one(filter_q, {"$set": update_data})
+            self._invalidate("student", student_id)
             if result.modified_count > 0:
-                print(f" Student updated successfully")
+                self._say(f" Student updated successfully")
                 return True
             else:
-                print("No student found to update")
+                self._say("No student found to update")
                 return False
         except Exception as e:
-            print(f" Error updating student: {e}")
+            self._say(f" Error updating student: {e}")
             return False
     
     def delete_student(self, student_id):
         """Remove a student by id or admission number."""
+        from bson import ObjectId
         try:
             # Build OR filters: try to remove by ObjectId and by admission_number (trimmed)
             filters = []
@@ -331,20 +617,22 @@ class EduTrackManager:
             filters.append({"admission_number": student_id.strip()})
 
             result = self.db.students.delete_many({"$or": filters})
+            self._invalidate("student", student_id)
             if result.deleted_count > 0:
-                print(f" Student deleted successfully (removed {result.deleted_count})")
+                self._say(f" Student deleted successfully (removed {result.deleted_count})")
                 return True
             else:
-                print("No student found to delete")
+                self._say("No student found to delete")
                 return False
         except Exception as e:
-            print(f" Error deleting student: {e}")
+            self._say(f" Error deleting student: {e}")
             return False
     
     # Subjects
     
     def add_subject(self, name, code, teacher_id=None):
         """Create a subject. Teacher id is optional."""
+        from bson import ObjectId
         try:
             subject_document = {
                 "name": name,
@@ -354,53 +642,62 @@ class EduTrackManager:
             }
             
             result = self.db.subjects.insert_one(subject_document)
-            print(f" Subject '{name}' added with ID: {result.inserted_id}")
+            self.reference_cache.invalidate_listing("subject")
+            self._say(f" Subject '{name}' added with ID: {result.inserted_id}")
             return str(result.inserted_id)
             
         except Exception as e:
-            print(f" Error adding subject: {e}")
+            self._say(f" Error adding subject: {e}")
             return None
     
-    def get_all_subjects(self):
-        """List all subjects."""
+    def iter_subjects(self, query=None, after=None, limit=None, batch_size=500, projection=None):
+        """Stream subjects in _id order without loading the collection."""
+        yield from self._keyset_cursor(self.db.subjects, query, after, limit, batch_size, projection)
+
+    def get_all_subjects(self, limit=None, after=None, projection=LIST_PROJECTIONS["subjects"]):
+        """List subjects. Pass limit/after to fetch one page (see _keyset_cursor)."""
         try:
-            subjects = list(self.db.subjects.find())
+            subjects = self._reference_page("subject", after, limit, projection)
             if subjects:
-                print(f"\n Total Subjects: {len(subjects)}")
-                for subject in subjects:
-                    print(f"  • {subject['name']} ({subject['code']})")
+                self._say(self._listing_header("Subjects", len(subjects), limit))
+                if self.verbose:
+                    for subject in subjects:
+                        self._say(f"  • {subject['name']} ({subject['code']})")
                 return subjects
             else:
-                print("No subjects found")
+                self._say("No subjects found")
                 return []
         except Exception as e:
-            print(f" Error getting subjects: {e}")
+            self._say(f" Error getting subjects: {e}")
             return []
 
     def update_subject(self, subject_id, **kwargs):
         """Update a subject by id or code."""
+        from bson import ObjectId
         try:
             update_data = {k: v for k, v in kwargs.items() if v is not None}
             if not update_data:
-                print("No updates provided")
+                self._say("No updates provided")
                 return False
             try:
                 filter_q = {"_id": ObjectId(subject_id)}
             except Exception:
                 filter_q = {"code": subject_id}
             result = self.db.subjects.update_one(filter_q, {"$set": update_data})
+            self._invalidate("subject", subject_id)
             if result.modified_count > 0:
-                print(" Subject updated successfully")
+                self._say(" Subject updated successfully")
                 return True
             else:
-                print("No subject found to update")
+                self._say("No subject found to update")
                 return False
         except Exception as e:
-            print(f" Error updating subject: {e}")
+            self._say(f" Error updating subject: {e}")
             return False
 
     def delete_subject(self, subject_id):
         """Remove a subject by id or code."""
+        from bson import ObjectId
         try:
             filters = []
             try:
@@ -409,223 +706,519 @@ class EduTrackManager:
                 pass
             filters.append({"code": subject_id.strip()})
             result = self.db.subjects.delete_many({"$or": filters})
+            self._invalidate("subject", subject_id)
             if result.deleted_count > 0:
-                print(f" Subject deleted successfully (removed {result.deleted_count})")
+                self._say(f" Subject deleted successfully (removed {result.deleted_count})")
                 return True
             else:
-                print("No subject found to delete")
+                self._say("No subject found to delete")
                 return False
         except Exception as e:
-            print(f" Error deleting subject: {e}")
+            self._say(f" Error deleting subject: {e}")
             return False
     
     # Attendance
     
     def record_attendance(self, student_id, attendance_date, status):
-        """Save an attendance record for a student."""
+        """Save a student's attendance for a day, replacing any earlier status.
+
+        Upserts on (student_id, date), so re-recording the same day is safe.
+        """
         try:
-            # Convert date to datetime if necessary
-            if isinstance(attendance_date, date) and not isinstance(attendance_date, datetime):
-                attendance_date = datetime.combine(attendance_date, datetime.min.time())
-            
             # resolve student identifier: ObjectId or admission_number
-            try:
-                sid_obj = ObjectId(student_id)
-            except Exception:
-                s = self.db.students.find_one({"admission_number": student_id})
-                if not s:
-                    print(f" Student not found for identifier: {student_id}")
-                    return None
-                sid_obj = s['_id']
+            sid_obj = self.resolver.resolve("student", student_id)
+            if not sid_obj:
+                self._say(f" Student not found for identifier: {student_id}")
+                return None
 
-            attendance_document = {
-                "student_id": sid_obj,
-                "date": attendance_date,
-                "status": status,  # Present, Absent, Late
-                "created_at": datetime.utcnow()
-            }
-            
-            result = self.db.attendance.insert_one(attendance_document)
-            print(f" Attendance recorded: {status}")
-            return str(result.inserted_id)
+            from pymongo import ReturnDocument
+            query, update = self._attendance_upsert(sid_obj, attendance_date, status)
+            # The previous status (if any) tells the summaries what to move
+            before = self.db.attendance.find_one_and_update(
+                query, update, projection={"status": 1}, upsert=True,
+                return_document=ReturnDocument.BEFORE)
+            changes = [(sid_obj, query["date"], status, 1)]
+            if before is not None:
+                changes.append((sid_obj, query["date"], before.get("status"), -1))
+            self._apply_summary_changes(changes)
+            self._say(f" Attendance recorded: {status}")
+            return str(before["_id"] if before is not None else update["$setOnInsert"]["_id"])
             
         except Exception as e:
-            print(f" Error recording attendance: {e}")
+            self._say(f" Error recording attendance: {e}")
+            return None
+
+    def record_class_attendance(self, class_id, attendance_date, register, default_status=None):
+        """Record a whole class register for one day with a single bulk write.
+
+        register maps admission numbers (or student ids) to a status
+        (Present/Absent/Late). With default_status, class members missing
+        from the register get that status. Each mark is an upsert on
+        (student_id, date), so re-submitting a register only changes what
+        differs. Returns {"recorded", "updated", "unchanged", "failed",
+        "unknown"} where unknown lists register keys that are not students
+        of the class, or None on error.
+        """
+        try:
+            cid = self.resolver.resolve("class", class_id)
+            if not cid:
+                self._say(f" Class with identifier {class_id} not found")
+                return None
+
+            # One roster query resolves admission numbers and checks membership
+            roster = {}
+            for s in self.db.students.find({"class_id": cid}, {"admission_number": 1}):
+                roster[str(s["_id"])] = s["_id"]
+                if s.get("admission_number"):
+                    roster[s["admission_number"]] = s["_id"]
+
+            marks = {}
+            if default_status is not None:
+                marks = {oid: default_status for oid in roster.values()}
+            unknown = []
+            for key, status in register.items():
+                sid = roster.get(str(key).strip())
+                if sid is None:
+                    unknown.append(key)
+                else:
+                    marks[sid] = status
+
+            day = self._as_datetime(attendance_date)
+            summary, failed = self._write_attendance_marks({(sid, day): status for sid, status in marks.items()})
+            summary["unknown"] = unknown
+
+            self._say(f" Register saved: {summary['recorded']} recorded, {summary['updated']} updated, "
+                      f"{summary['unchanged']} unchanged")
+            if failed:
+                self._say(f" {len(failed)} marks failed: {next(iter(failed.values()))}")
+            if unknown:
+                self._say(f" Not in class: {', '.join(map(str, unknown))}")
+            return summary
+        except Exception as e:
+            self._say(f" Error recording class attendance: {e}")
+            return None
+
+    def attendance_buffer(self, **options):
+        """Return this manager's write-behind attendance buffer, starting it if needed.
+
+        options (max_batch, flush_interval, max_pending, durable) are passed
+        to edutrack_buffer.AttendanceWriteBuffer on first call. Marks go in
+        with buffer.record(student_id, date, status); close_connection()
+        flushes whatever is still queued.
+        """
+        if self._attendance_buffer is None:
+            from edutrack_buffer import AttendanceWriteBuffer
+            self._attendance_buffer = AttendanceWriteBuffer(self, **options)
+        return self._attendance_buffer
+
+    def _write_attendance_marks(self, marks, collection=None):
+        """Upsert {(student ObjectId, datetime): status} with one bulk write.
+
+        Existing statuses are read first (one query) so attendance_summaries
+        can be moved by the difference. Returns ({"recorded", "updated",
+        "unchanged", "failed"}, {mark index: error}).
+        """
+        from pymongo import UpdateOne
+        from pymongo.errors import BulkWriteError
+        keys = list(marks)
+        if not keys:
+            return self._upsert_counts(0)
+
+        fields = ("student_id", "date")
+        before = {(doc["student_id"], doc["date"]): doc.get("status") for doc in self.db.attendance.find(
+            self._marks_query(fields, keys), {"student_id": 1, "date": 1, "status": 1})}
+
+        requests = [UpdateOne(*self._attendance_upsert(sid, day, marks[(sid, day)]), upsert=True)
+                    for sid, day in keys]
+        try:
+            target = collection if collection is not None else self.db.attendance
+            counts, failed = self._upsert_counts(len(keys), result=target.bulk_write(requests, ordered=False))
+        except BulkWriteError as e:
+            counts, failed = self._upsert_counts(len(keys), error=e)
+        self._apply_summary_changes(self._mark_changes(marks, before, failed))
+        return counts, failed
+
+    @staticmethod
+    def _attendance_upsert(student_oid, attendance_date, status):
+        """(filter, update) that sets one student's status for one day.
+
+        The _id is chosen client-side so an upsert's id is known without a
+        second read.
+        """
+        from bson import ObjectId
+        return (
+            {"student_id": student_oid, "date": EduTrackManager._as_datetime(attendance_date)},
+            {"$set": {"status": status},
+             "$setOnInsert": {"_id": ObjectId(), "created_at": datetime.utcnow()}},
+        )
+
+    # Attendance summaries
+    #
+    # attendance_summaries holds one document per student per term with
+    # total/present/absent/late counters. Every attendance write moves them
+    # with $inc, so summaries are a read of a few small documents. Run
+    # rebuild_attendance_summaries() (main.py --rebuild-summaries) after
+    # writing attendance outside the manager.
+
+    @staticmethod
+    def _term(day):
+        """School term label for a date: Jan-Apr T1, May-Aug T2, Sep-Dec T3."""
+        return f"{day.year}-T{(day.month - 1) // 4 + 1}"
+
+    @staticmethod
+    def _summary_requests(changes):
+        """$inc upserts for attendance_summaries.
+
+        changes holds (student ObjectId, date, status, +1 or -1) entries;
+        entries that cancel out (e.g. re-recording the same status) produce
+        no request.
+        """
+        from pymongo import UpdateOne
+        deltas = {}
+        for sid, day, status, sign in changes:
+            inc = deltas.setdefault((sid, EduTrackManager._term(day)), {})
+            for field in ("total", ATTENDANCE_STATUS_FIELDS.get(status)):
+                if field:
+                    inc[field] = inc.get(field, 0) + sign
+        now = datetime.utcnow()
+        requests = []
+        for (sid, term), inc in deltas.items():
+            inc = {field: n for field, n in inc.items() if n}
+            if inc:
+                requests.append(UpdateOne({"student_id": sid, "term": term},
+                                          {"$inc": inc, "$set": {"updated_at": now}}, upsert=True))
+        return requests
+
+    def _apply_summary_changes(self, changes):
+        """Move attendance_summaries by the given changes in one bulk write."""
+        requests = self._summary_requests(changes)
+        if not requests:
+            return
+        try:
+            self.db.attendance_summaries.bulk_write(requests, ordered=False)
+        except Exception as e:
+            self._say(f" Attendance summaries not updated ({e}); run rebuild_attendance_summaries()")
+
+    @staticmethod
+    def _summary_rebuild_pipeline():
+        """Aggregation that recomputes every summary into attendance_summaries."""
+        month = {"$month": "$date"}
+        term = {"$concat": [
+            {"$toString": {"$year": "$date"}}, "-T",
+            {"$cond": [{"$lte": [month, 4]}, "1", {"$cond": [{"$lte": [month, 8]}, "2", "3"]}]},
+        ]}
+        return [
+            EduTrackManager._attendance_group({"student_id": "$student_id", "term": term}),
+            {"$project": {"_id": 0, "student_id": "$_id.student_id", "term": "$_id.term",
+                          "total": 1, "present": 1, "absent": 1, "late": 1,
+                          "updated_at": {"$literal": datetime.utcnow()}}},
+            {"$out": "attendance_summaries"},
+        ]
+
+    def _attendance_snapshot(self, query):
+        """Map _id -> (student_id, date, status) for the matching attendance."""
+        return {doc["_id"]: (doc["student_id"], doc["date"], doc.get("status"))
+                for doc in self.db.attendance.find(query, {"student_id": 1, "date": 1, "status": 1})}
+
+    def _apply_snapshot_changes(self, before):
+        """Move summaries by whatever changed in `before`'s records since it was taken."""
+        if not before:
+            return
+        after = self._attendance_snapshot({"_id": {"$in": list(before)}})
+        self._apply_summary_changes(self._snapshot_changes(before, after))
+
+    @staticmethod
+    def _snapshot_changes(before, after):
+        """Summary changes that turn the before snapshot into the after one."""
+        changes = []
+        for oid, old in before.items():
+            new = after.get(oid)
+            if new != old:
+                changes.append((*old, -1))
+                if new is not None:
+                    changes.append((*new, 1))
+        return changes
+
+    def rebuild_attendance_summaries(self):
+        """Recompute attendance_summaries from scratch; returns the summary count."""
+        try:
+            self.db.attendance.aggregate(self._summary_rebuild_pipeline())
+            count = self.db.attendance_summaries.count_documents({})
+            self._say(f" Attendance summaries rebuilt ({count} student terms)")
+            return count
+        except Exception as e:
+            self._say(f" Error rebuilding attendance summaries: {e}")
             return None
     
-    def get_student_attendance(self, student_id):
+    def get_student_attendance(self, student_id, projection=LIST_PROJECTIONS["attendance"]):
         """Return attendance records for a student."""
         try:
-            try:
-                sid_obj = ObjectId(student_id)
-            except Exception:
-                s = self.db.students.find_one({"admission_number": student_id})
-                if not s:
-                    print(f"Student not found for identifier: {student_id}")
-                    return []
-                sid_obj = s['_id']
-            records = list(self.db.attendance.find({"student_id": sid_obj}).sort("date", -1))
+            sid_obj = self.resolver.resolve("student", student_id)
+            if not sid_obj:
+                self._say(f"Student not found for identifier: {student_id}")
+                return []
+            records = list(self.db.attendance.find({"student_id": sid_obj}, projection).sort("date", -1))
             if records:
-                print(f"\n Attendance Records: {len(records)}")
-                for record in records:
-                    print(f"  • {record['date']}: {record['status']}")
+                self._say(f"\n Attendance Records: {len(records)}")
+                if self.verbose:
+                    for record in records:
+                        self._say(f"  • {record['date']}: {record['status']}")
                 return records
             else:
-                print("No attendance records found")
+                self._say("No attendance records found")
                 return []
         except Exception as e:
-            print(f" Error getting attendance: {e}")
+            self._say(f" Error getting attendance: {e}")
             return []
     
-    def get_attendance_summary(self, student_id):
-        """Show a simple attendance summary for a student."""
+    def get_attendance_summary(self, student_id, term=None):
+        """Show a simple attendance summary for a student.
+
+        Reads the precomputed attendance_summaries; term (e.g. "2024-T1")
+        limits it to one term.
+        """
         try:
-            try:
-                sid_obj = ObjectId(student_id)
-            except Exception:
-                s = self.db.students.find_one({"admission_number": student_id})
-                if not s:
-                    print(f"Student not found for identifier: {student_id}")
-                    return None
-                sid_obj = s['_id']
+            sid_obj = self.resolver.resolve("student", student_id)
+            if not sid_obj:
+                self._say(f"Student not found for identifier: {student_id}")
+                return None
 
-            stats = list(self.db.attendance.aggregate([
-                {"$match": {"student_id": sid_obj}},
-                {"$group": {
-                    "_id": "$student_id",
-                    "total": {"$sum": 1},
-                    "present": {"$sum": {"$cond": [{"$eq": ["$status", "Present"]}, 1, 0]}},
-                    "absent": {"$sum": {"$cond": [{"$eq": ["$status", "Absent"]}, 1, 0]}},
-                    "late": {"$sum": {"$cond": [{"$eq": ["$status", "Late"]}, 1, 0]}}
-                }}
-            ]))
+            query = {"student_id": sid_obj}
+            if term:
+                query["term"] = term
+            s = {"_id": sid_obj, "total": 0, "present": 0, "absent": 0, "late": 0}
+            for doc in self.db.attendance_summaries.find(query):
+                for field in ("total", "present", "absent", "late"):
+                    s[field] += doc.get(field, 0)
             
-            if stats:
-                s = stats[0]
-                print(f"\n Attendance Summary:")
-                print(f"   Total Days: {s['total']}")
-                print(f"   Present: {s['present']}")
-                print(f"   Absent: {s['absent']}")
-                print(f"   Late: {s['late']}")
-                if s['total'] > 0:
-                    percentage = (s['present'] / s['total']) * 100
-                    print(f"   Attendance: {percentage:.1f}%")
+            if s['total'] > 0:
+                self._say(f"\n Attendance Summary{f' ({term})' if term else ''}:")
+                self._say(f"   Total Days: {s['total']}")
+                self._say(f"   Present: {s['present']}")
+                self._say(f"   Absent: {s['absent']}")
+                self._say(f"   Late: {s['late']}")
+                percentage = (s['present'] / s['total']) * 100
+                self._say(f"   Attendance: {percentage:.1f}%")
                 return s
             else:
-                print("No attendance data found")
+                self._say("No attendance data found")
                 return None
         except Exception as e:
-            print(f"✗ Error getting attendance summary: {e}")
+            self._say(f"✗ Error getting attendance summary: {e}")
             return None
 
-        def get_all_attendance(self):
-            """List all attendance records."""
-            try:
-                records = list(self.db.attendance.find().sort("date", -1))
-                if records:
-                    print(f"\n Total Attendance Records: {len(records)}")
+    def get_class_attendance_summary(self, class_id, date_from=None, date_to=None):
+        """Attendance counts and percentage for every student in a class.
+
+        One query for the class list and one $match/$group pipeline over
+        attendance (served by the student_id/date index). Students without
+        records are included with zero counts.
+        """
+        try:
+            cls_obj_id = self.resolver.resolve("class", class_id)
+            if not cls_obj_id:
+                self._say(f"Class with identifier {class_id} not found")
+                return []
+            students = list(self.db.students.find({"class_id": cls_obj_id}, LIST_PROJECTIONS["students"]))
+            if not students:
+                self._say("No students found in this class")
+                return []
+
+            match = {"student_id": {"$in": [st["_id"] for st in students]}}
+            match.update(self._date_range(date_from, date_to))
+            counts = {s["_id"]: s for s in self.db.attendance.aggregate([
+                {"$match": match},
+                self._attendance_group("$student_id"),
+            ])}
+
+            summary = []
+            for st in sorted(students, key=lambda st: st.get("admission_number") or ""):
+                row = self._attendance_row(counts.get(st["_id"], {}))
+                row.update({
+                    "student_id": st["_id"],
+                    "admission_number": st.get("admission_number"),
+                    "name": f"{st.get('first_name')} {st.get('last_name')}",
+                })
+                summary.append(row)
+
+            self._say(f"\n Class Attendance Summary: {len(summary)} students")
+            if self.verbose:
+                for r in summary:
+                    self._say(f"  • {r['name']} ({r['admission_number']}) | Present: {r['present']} | Absent: {r['absent']} | Late: {r['late']} | {r['percentage']:.1f}%")
+            return summary
+        except Exception as e:
+            self._say(f" Error getting class attendance summary: {e}")
+            return []
+
+    def get_school_attendance_summary(self, date_from=None, date_to=None):
+        """Attendance counts and percentage per class across the whole school.
+
+        Records are grouped per student first, so the students $lookup runs
+        once per student rather than once per attendance record.
+        """
+        try:
+            stats = list(self.db.attendance.aggregate([
+                {"$match": self._date_range(date_from, date_to)},
+                self._attendance_group("$student_id"),
+                {"$lookup": {"from": "students", "localField": "_id", "foreignField": "_id", "as": "student"}},
+                {"$group": {
+                    "_id": {"$arrayElemAt": ["$student.class_id", 0]},
+                    "students": {"$sum": 1},
+                    "total": {"$sum": "$total"},
+                    "present": {"$sum": "$present"},
+                    "absent": {"$sum": "$absent"},
+                    "late": {"$sum": "$late"},
+                }},
+            ]))
+            names = self.resolver.natural_keys("class", (s["_id"] for s in stats))
+
+            summary = []
+            for s in stats:
+                row = self._attendance_row(s)
+                row.update({
+                    "class_id": s["_id"],
+                    "class_name": names.get(s["_id"], "Unassigned" if s["_id"] is None else str(s["_id"])),
+                    "students": s["students"],
+                })
+                summary.append(row)
+            summary.sort(key=lambda r: r["class_name"])
+
+            if summary:
+                self._say(f"\n School Attendance Summary: {len(summary)} classes")
+                if self.verbose:
+                    for r in summary:
+                        self._say(f"  • {r['class_name']} ({r['students']} students) | Present: {r['present']} | Absent: {r['absent']} | Late: {r['late']} | {r['percentage']:.1f}%")
+            else:
+                self._say("No attendance data found")
+            return summary
+        except Exception as e:
+            self._say(f" Error getting school attendance summary: {e}")
+            return []
+
+    def iter_attendance(self, query=None, after=None, limit=None, batch_size=500, projection=None):
+        """Stream attendance records in _id order with admission_number added.
+
+        Admission numbers are resolved with one $in query per batch.
+        """
+        cursor = self._keyset_cursor(self.db.attendance, query, after, limit, batch_size, projection)
+        for page in _chunked(cursor, batch_size):
+            yield from self._add_references(page, [("student_id", "student", "admission_number")])
+
+    def get_all_attendance(self, limit=None, after=None, projection=LIST_PROJECTIONS["attendance"]):
+        """List attendance records. Pass limit/after to fetch one page."""
+        try:
+            records = list(self.iter_attendance(after=after, limit=limit, projection=projection))
+            if records:
+                self._say(self._listing_header("Attendance Records", len(records), limit))
+                if self.verbose:
                     for r in records:
-                        sid = r.get('student_id')
-                        # try to fetch admission number
-                        try:
-                            st = self.db.students.find_one({"_id": sid}) if sid else None
-                            adm = st['admission_number'] if st else str(sid)
-                        except Exception:
-                            adm = str(sid)
-                        print(f"  • {r['_id']} | Student: {adm} | {r.get('date')} | {r.get('status')}")
-                    return records
-                else:
-                    print("No attendance records found")
-                    return []
-            except Exception as e:
-                print(f" Error listing attendance: {e}")
+                        self._say(f"  • {r['_id']} | Student: {r['admission_number']} | {r.get('date')} | {r.get('status')}")
+                return records
+            else:
+                self._say("No attendance records found")
                 return []
+        except Exception as e:
+            self._say(f" Error listing attendance: {e}")
+            return []
 
-        def update_attendance(self, attendance_id, date=None, status=None):
-            """Update an attendance record. Use id or 'admission|YYYY-MM-DD'."""
-            try:
-                # resolve filter
-                filter_q = None
-                if isinstance(attendance_id, str) and '|' in attendance_id:
-                    adm, date_s = attendance_id.split('|', 1)
-                    s = self.db.students.find_one({"admission_number": adm})
-                    if not s:
-                        print(f"Student not found for admission: {adm}")
-                        return False
-                    try:
-                        date_obj = datetime.strptime(date_s, '%Y-%m-%d').date()
-                    except Exception:
-                        print('Invalid date in composite identifier')
-                        return False
-                    filter_q = {"student_id": s['_id'], "date": date_obj}
-                else:
+    def update_attendance(self, attendance_id, date=None, status=None):
+        """Update attendance by id or 'admission|YYYY-MM-DD'.
+
+        attendance_id may also be a list of ids/composite keys; all of them get
+        the same update in one bulk write.
+        """
+        try:
+            update_data = {}
+            if date is not None:
+                if isinstance(date, str):
                     try:
-                        filter_q = {"_id": ObjectId(attendance_id)}
+                        date = datetime.strptime(date, '%Y-%m-%d')
                     except Exception:
-                        print('Invalid attendance identifier')
+                        self._say('Invalid date format')
                         return False
+                update_data['date'] = self._as_datetime(date)
+            if status is not None:
+                update_data['status'] = status
 
-                update_data = {}
-                if date is not None:
-                    if isinstance(date, str):
-                        try:
-                            date_val = datetime.strptime(date, '%Y-%m-%d').date()
-                        except Exception:
-                            print('Invalid date format')
-                            return False
-                    else:
-                        date_val = date
-                    update_data['date'] = date_val
-                if status is not None:
-                    update_data['status'] = status
-
-                if not update_data:
-                    print('No updates provided')
-                    return False
+            if not update_data:
+                self._say('No updates provided')
+                return False
 
-                result = self.db.attendance.update_one(filter_q, {"$set": update_data})
-                if result.modified_count > 0:
-                    print(' Attendance updated successfully')
-                    return True
-                else:
-                    print('No attendance record found to update')
-                    return False
-            except Exception as e:
-                print(f" Error updating attendance: {e}")
+            filters = self._attendance_filters(attendance_id)
+            if not filters:
                 return False
 
-        def delete_attendance(self, attendance_id):
-            """Delete attendance by id or 'admission|YYYY-MM-DD'."""
+            from pymongo import UpdateOne
+            before = self._attendance_snapshot({"$or": filters})
             try:
-                # composite
-                if isinstance(attendance_id, str) and '|' in attendance_id:
-                    adm, date_s = attendance_id.split('|', 1)
-                    s = self.db.students.find_one({"admission_number": adm})
-                    if not s:
-                        print(f"Student not found for admission: {adm}")
-                        return False
-                    try:
-                        date_obj = datetime.strptime(date_s, '%Y-%m-%d').date()
-                    except Exception:
-                        print('Invalid date in composite identifier')
-                        return False
-                    result = self.db.attendance.delete_many({"student_id": s['_id'], "date": date_obj})
-                else:
-                    try:
-                        result = self.db.attendance.delete_many({"_id": ObjectId(attendance_id)})
-                    except Exception:
-                        print('Invalid attendance identifier')
-                        return False
+                result = self.db.attendance.bulk_write(
+                    [UpdateOne(f, {"$set": update_data}) for f in filters], ordered=False)
+            finally:
+                self._apply_snapshot_changes(before)
+            if result.modified_count > 0:
+                self._say(f' Attendance updated successfully (updated {result.modified_count})')
+                return True
+            else:
+                self._say('No attendance record found to update')
+                return False
+        except Exception as e:
+            self._say(f" Error updating attendance: {e}")
+            return False
 
-                if result.deleted_count > 0:
-                    print(f' Attendance deleted successfully (removed {result.deleted_count})')
-                    return True
-                else:
-                    print('No attendance found to delete')
-                    return False
-            except Exception as e:
-                print(f" Error deleting attendance: {e}")
+    def delete_attendance(self, attendance_id):
+        """Delete attendance by id or 'admission|YYYY-MM-DD' (or a list of them)."""
+        try:
+            filters = self._attendance_filters(attendance_id)
+            if not filters:
+                return False
+
+            from pymongo import DeleteMany
+            before = self._attendance_snapshot({"$or": filters})
+            try:
+                result = self.db.attendance.bulk_write([DeleteMany(f) for f in filters], ordered=False)
+            finally:
+                self._apply_snapshot_changes(before)
+            if result.deleted_count > 0:
+                self._say(f' Attendance deleted successfully (removed {result.deleted_count})')
+                return True
+            else:
+                self._say('No attendance found to delete')
                 return False
+        except Exception as e:
+            self._say(f" Error deleting attendance: {e}")
+            return False
+
+    def _attendance_filters(self, attendance_ids):
+        """Build filters for attendance ids and 'admission|YYYY-MM-DD' keys.
+
+        Admission numbers are resolved in one batch. Invalid entries are
+        reported and skipped.
+        """
+        from bson import ObjectId
+        if isinstance(attendance_ids, (str, ObjectId)):
+            attendance_ids = [attendance_ids]
+        composites = [a.split('|', 1) for a in attendance_ids if isinstance(a, str) and '|' in a]
+        students = self.resolver.resolve_many("student", [adm.strip() for adm, _ in composites])
+
+        filters = []
+        for aid in attendance_ids:
+            if isinstance(aid, str) and '|' in aid:
+                adm, date_s = (part.strip() for part in aid.split('|', 1))
+                if adm not in students:
+                    self._say(f"Student not found for admission: {adm}")
+                    continue
+                try:
+                    date_obj = datetime.strptime(date_s, '%Y-%m-%d')
+                except Exception:
+                    self._say(f'Invalid date in composite identifier: {aid}')
+                    continue
+                filters.append({"student_id": students[adm], "date": date_obj})
+            else:
+                try:
+                    filters.append({"_id": ObjectId(aid)})
+                except Exception:
+                    self._say(f'Invalid attendance identifier: {aid}')
+        return filters
     
     # Exams
     
@@ -636,14 +1229,10 @@ class EduTrackManager:
             if isinstance(exam_date, date) and not isinstance(exam_date, datetime):
                 exam_date = datetime.combine(exam_date, datetime.min.time())
             # resolve class identifier: ObjectId or class name
-            try:
-                cls_obj_id = ObjectId(class_id)
-            except Exception:
-                cls = self.db.classes.find_one({"name": class_id})
-                if not cls:
-                    print(f" Class not found for identifier: {class_id}")
-                    return None
-                cls_obj_id = cls['_id']
+            cls_obj_id = self.resolver.resolve("class", class_id)
+            if not cls_obj_id:
+                self._say(f" Class not found for identifier: {class_id}")
+                return None
 
             exam_document = {
                 "name": name,
@@ -653,49 +1242,52 @@ class EduTrackManager:
             }
             
             result = self.db.exams.insert_one(exam_document)
-            print(f" Exam '{name}' added with ID: {result.inserted_id}")
+            self.reference_cache.invalidate_listing("exam")
+            self._say(f" Exam '{name}' added with ID: {result.inserted_id}")
             return str(result.inserted_id)
             
         except Exception as e:
-            print(f" Error adding exam: {e}")
+            self._say(f" Error adding exam: {e}")
             return None
     
-    def get_all_exams(self):
-        """List all exams."""
+    def iter_exams(self, query=None, after=None, limit=None, batch_size=500, projection=None):
+        """Stream exams in _id order without loading the collection."""
+        yield from self._keyset_cursor(self.db.exams, query, after, limit, batch_size, projection)
+
+    def get_all_exams(self, limit=None, after=None, projection=LIST_PROJECTIONS["exams"]):
+        """List exams. Pass limit/after to fetch one page (see _keyset_cursor)."""
         try:
-            exams = list(self.db.exams.find())
+            exams = self._reference_page("exam", after, limit, projection)
             if exams:
-                print(f"\n Total Exams: {len(exams)}")
-                for exam in exams:
-                    print(f"  • {exam['name']} - {exam['date']}")
+                self._say(self._listing_header("Exams", len(exams), limit))
+                if self.verbose:
+                    for exam in exams:
+                        self._say(f"  • {exam['name']} - {exam['date']}")
                 return exams
             else:
-                print("No exams found")
+                self._say("No exams found")
                 return []
         except Exception as e:
-            print(f" Error getting exams: {e}")
+            self._say(f" Error getting exams: {e}")
             return []
 
-    def get_exam(self, exam_id):
+    def get_exam(self, exam_id, projection=None):
         """Get an exam by id or name."""
         try:
-            try:
-                filter_q = {"_id": ObjectId(exam_id)}
-            except Exception:
-                filter_q = {"name": exam_id}
-            exam = self.db.exams.find_one(filter_q)
+            exam = self._reference("exam", exam_id, projection)
             if exam:
-                print(f"\n Exam: {exam['name']} | Date: {exam.get('date')}")
+                self._say(f"\n Exam: {exam.get('name')} | Date: {exam.get('date')}")
                 return exam
             else:
-                print(f"Exam with ID {exam_id} not found")
+                self._say(f"Exam with ID {exam_id} not found")
                 return None
         except Exception as e:
-            print(f" Error getting exam: {e}")
+            self._say(f" Error getting exam: {e}")
             return None
 
     def update_exam(self, exam_id, **kwargs):
         """Update exam fields like name, date, or class."""
+        from bson import ObjectId
         try:
             update_data = {k: v for k, v in kwargs.items() if v is not None}
             # normalize date if present
@@ -705,12 +1297,7 @@ class EduTrackManager:
                     update_data['date'] = datetime.combine(d, datetime.min.time())
             # resolve class_id if provided (accept name or id)
             if 'class_id' in update_data and update_data['class_id']:
-                cid = update_data['class_id']
-                try:
-                    update_data['class_id'] = ObjectId(cid)
-                except Exception:
-                    cls = self.db.classes.find_one({"name": cid})
-                    update_data['class_id'] = cls['_id'] if cls else None
+                update_data['class_id'] = self.resolver.resolve("class", update_data['class_id'])
 
             try:
                 filter_q = {"_id": ObjectId(exam_id)}
@@ -718,22 +1305,24 @@ class EduTrackManager:
                 filter_q = {"name": exam_id}
 
             if not update_data:
-                print('No updates provided')
+                self._say('No updates provided')
                 return False
 
             result = self.db.exams.update_one(filter_q, {"$set": update_data})
+            self._invalidate("exam", exam_id)
             if result.modified_count > 0:
-                print(' Exam updated successfully')
+                self._say(' Exam updated successfully')
                 return True
             else:
-                print('No exam found to update')
+                self._say('No exam found to update')
                 return False
         except Exception as e:
-            print(f" Error updating exam: {e}")
+            self._say(f" Error updating exam: {e}")
             return False
 
     def delete_exam(self, exam_id):
         """Remove an exam by id or name."""
+        from bson import ObjectId
         try:
             filters = []
             try:
@@ -743,176 +1332,393 @@ class EduTrackManager:
             filters.append({"name": exam_id})
 
             result = self.db.exams.delete_many({"$or": filters})
+            self._invalidate("exam", exam_id)
             if result.deleted_count > 0:
-                print(f" Exam deleted successfully (removed {result.deleted_count})")
+                self._say(f" Exam deleted successfully (removed {result.deleted_count})")
                 return True
             else:
-                print('No exam found to delete')
+                self._say('No exam found to delete')
                 return False
         except Exception as e:
-            print(f" Error deleting exam: {e}")
+            self._say(f" Error deleting exam: {e}")
             return False
     
     # Results
     
     def record_result(self, student_id, exam_id, subject_id, score, remarks=None):
-        """Save a student's result for an exam+subject."""
+        """Save a student's result for an exam+subject, replacing any earlier mark.
+
+        Upserts on (student_id, exam_id, subject_id), so re-entering a mark
+        updates it instead of adding a duplicate.
+        """
         try:
             # Calculate grade
-            grade = self.calculate_grade(score)
+            grade = self.grade_scale.grade(score)
             # Resolve IDs: accept ObjectId strings or alternate identifiers
             # student: admission_number fallback
-            try:
-                sid_obj = ObjectId(student_id)
-            except Exception:
-                s = self.db.students.find_one({"admission_number": student_id})
-                if not s:
-                    print(f" Student not found for identifier: {student_id}")
-                    return None
-                sid_obj = s['_id']
+            sid_obj = self.resolver.resolve("student", student_id)
+            if not sid_obj:
+                self._say(f" Student not found for identifier: {student_id}")
+                return None
 
             # exam: name fallback
-            try:
-                eid_obj = ObjectId(exam_id)
-            except Exception:
-                e = self.db.exams.find_one({"name": exam_id})
-                if not e:
-                    print(f" Exam not found for identifier: {exam_id}")
-                    return None
-                eid_obj = e['_id']
+            eid_obj = self.resolver.resolve("exam", exam_id)
+            if not eid_obj:
+                self._say(f" Exam not found for identifier: {exam_id}")
+                return None
 
             # subject: code fallback
-            try:
-                subid_obj = ObjectId(subject_id)
-            except Exception:
-                sub = self.db.subjects.find_one({"code": subject_id})
-                if not sub:
-                    print(f" Subject not found for identifier: {subject_id}")
-                    return None
-                subid_obj = sub['_id']
+            subid_obj = self.resolver.resolve("subject", subject_id)
+            if not subid_obj:
+                self._say(f" Subject not found for identifier: {subject_id}")
+                return None
 
-            result_document = {
-                "student_id": sid_obj,
-                "exam_id": eid_obj,
-                "subject_id": subid_obj,
-                "score": score,
-                "grade": grade,
-                "remarks": remarks,
-                "created_at": datetime.utcnow()
-            }
-            
-            result = self.db.results.insert_one(result_document)
-            print(f" Result recorded: Score {score} = Grade {grade}")
-            return str(result.inserted_id)
+            from pymongo import ReturnDocument
+            query, update = self._result_upsert(sid_obj, eid_obj, subid_obj, score, grade, remarks)
+            before = self.db.results.find_one_and_update(
+                query, update, projection={"score": 1}, upsert=True,
+                return_document=ReturnDocument.BEFORE)
+            if before is None:
+                self._apply_result_changes([(sid_obj, eid_obj, subid_obj, score, 1)])
+            elif before.get("score") != score:
+                self._apply_result_changes([(sid_obj, eid_obj, subid_obj, score, 1),
+                                            (sid_obj, eid_obj, subid_obj, before.get("score"), -1)])
+            self._say(f" Result recorded: Score {score} = Grade {grade}")
+            return str(before["_id"] if before is not None else update["$setOnInsert"]["_id"])
             
         except Exception as e:
-            print(f" Error recording result: {e}")
+            self._say(f" Error recording result: {e}")
             return None
+
+    def record_mark_sheet(self, exam_id, subject_id, sheet):
+        """Record one subject's marks for an exam with a single bulk write.
+
+        sheet maps admission numbers (or student ids) to scores. Students
+        are resolved in one batch, the sheet is graded in one grade_many
+        call and every mark is an upsert on (student_id, exam_id,
+        subject_id), so re-entering a sheet only changes what differs; if
+        two keys name the same student the later one wins. Returns
+        {"recorded", "updated", "unchanged", "failed", "rejected"} where
+        rejected maps sheet keys to the reason they were skipped, or None
+        on error.
+        """
+        try:
+            eid_obj = self.resolver.resolve("exam", exam_id)
+            if not eid_obj:
+                self._say(f" Exam not found for identifier: {exam_id}")
+                return None
+            subid_obj = self.resolver.resolve("subject", subject_id)
+            if not subid_obj:
+                self._say(f" Subject not found for identifier: {subject_id}")
+                return None
+
+            students = self.resolver.resolve_many("student", [str(k).strip() for k in sheet])
+            marks, rejected = {}, {}
+            for key, score in sheet.items():
+                sid = students.get(str(key).strip())
+                if sid is None:
+                    rejected[key] = "Student not found"
+                elif isinstance(score, bool) or not isinstance(score, (int, float)):
+                    rejected[key] = f"Invalid score: {score!r}"
+                else:
+                    marks[(sid, eid_obj, subid_obj)] = (score, None)
+
+            summary, failed = self._write_result_marks(marks)
+            summary["rejected"] = rejected
+
+            self._say(f" Mark sheet saved: {summary['recorded']} recorded, {summary['updated']} updated, "
+                      f"{summary['unchanged']} unchanged")
+            if failed:
+                self._say(f" {len(failed)} marks failed: {next(iter(failed.values()))}")
+            for key, reason in rejected.items():
+                self._say(f"  • {key}: {reason}")
+            return summary
+        except Exception as e:
+            self._say(f" Error recording mark sheet: {e}")
+            return None
+
+    def _write_result_marks(self, marks):
+        """Upsert {(student, exam, subject ObjectIds): (score, remarks)} with one bulk write.
+
+        Existing scores are read first (one query) so result_stats can be
+        moved by the difference; remarks of None keep what is stored.
+        Returns ({"recorded", "updated", "unchanged", "failed"}, {mark index: error}).
+        """
+        from pymongo.errors import BulkWriteError
+        keys = list(marks)
+        if not keys:
+            return self._upsert_counts(0)
+
+        fields = ("student_id", "exam_id", "subject_id")
+        before = {tuple(doc[f] for f in fields): doc.get("score") for doc in self.db.results.find(
+            self._marks_query(fields, keys), {"student_id": 1, "exam_id": 1, "subject_id": 1, "score": 1})}
+
+        try:
+            counts, failed = self._upsert_counts(len(keys), result=self.db.results.bulk_write(
+                self._result_mark_requests(marks, self.grade_scale), ordered=False))
+        except BulkWriteError as e:
+            counts, failed = self._upsert_counts(len(keys), error=e)
+        self._apply_result_changes(self._mark_changes(marks, before, failed, value=lambda mark: mark[0]))
+        return counts, failed
+
+    @staticmethod
+    def _result_mark_requests(marks, grade_scale):
+        """Upserts for {(student, exam, subject): (score, remarks)}, graded in one call."""
+        from pymongo import UpdateOne
+        grades = grade_scale.grade_many([score for score, _ in marks.values()])
+        return [UpdateOne(*EduTrackManager._result_upsert(*key, score, grade, remarks), upsert=True)
+                for (key, (score, remarks)), grade in zip(marks.items(), grades)]
+
+    @staticmethod
+    def _result_upsert(student_oid, exam_oid, subject_oid, score, grade, remarks=None):
+        """(filter, update) that sets one mark; remarks are kept unless given."""
+        from bson import ObjectId
+        update = {"$set": {"score": score, "grade": grade},
+                  "$setOnInsert": {"_id": ObjectId(), "created_at": datetime.utcnow()}}
+        if remarks is not None:
+            update["$set"]["remarks"] = remarks
+        else:
+            update["$setOnInsert"]["remarks"] = None
+        return {"student_id": student_oid, "exam_id": exam_oid, "subject_id": subject_oid}, update
     
-    def get_student_results(self, student_id):
+    def get_student_results(self, student_id, projection=LIST_PROJECTIONS["results"]):
         """List results for a student and show a simple average."""
         try:
-            try:
-                sid_obj = ObjectId(student_id)
-            except Exception:
-                s = self.db.students.find_one({"admission_number": student_id})
-                if not s:
-                    print(f"Student not found for identifier: {student_id}")
-                    return []
-                sid_obj = s['_id']
-            results = list(self.db.results.find({"student_id": sid_obj}))
+            sid_obj = self.resolver.resolve("student", student_id)
+            if not sid_obj:
+                self._say(f"Student not found for identifier: {student_id}")
+                return []
+            results = list(self.db.results.find({"student_id": sid_obj}, projection))
             if results:
-                print(f"\n Student Results: {len(results)}")
-                total_score = 0
-                for result in results:
-                    print(f"  • Score: {result['score']} - Grade: {result['grade']}")
-                    total_score += result['score']
-                
-                if len(results) > 0:
-                    average = total_score / len(results)
-                    print(f"\n   Average Score: {average:.2f}")
+                self._say(f"\n Student Results: {len(results)}")
+                if self.verbose:
+                    for result in results:
+                        self._say(f"  • Score: {result['score']} - Grade: {result['grade']}")
+
+                    # precomputed by the result write paths
+                    stats = self.db.result_stats.find_one({"scope": "student", "key": sid_obj})
+                    if stats and stats.get("count"):
+                        self._say(f"\n   Average Score: {stats['sum'] / stats['count']:.2f}")
                 
                 return results
             else:
-                print("No results found")
+                self._say("No results found")
                 return []
         except Exception as e:
-            print(f" Error getting results: {e}")
+            self._say(f" Error getting results: {e}")
             return []
     
-    def get_student_transcript(self, student_id):
+    def get_student_transcript(self, student_id, projection=None):
         """Print student info and all their results."""
         try:
-            try:
-                sid_obj = ObjectId(student_id)
-            except Exception:
-                s = self.db.students.find_one({"admission_number": student_id})
-                if not s:
-                    print("Student not found")
-                    return None
-                sid_obj = s['_id']
+            sid_obj = self.resolver.resolve("student", student_id)
+            if not sid_obj:
+                self._say("Student not found")
+                return None
 
             student = self.db.students.find_one({"_id": sid_obj})
             if not student:
-                print("Student not found")
+                self._say("Student not found")
                 return None
 
-            results = list(self.db.results.find({"student_id": sid_obj}))
+            results = list(self.db.results.find({"student_id": sid_obj}, projection))
             
-            print(f"\n TRANSCRIPT")
-            print(f"Name: {student['first_name']} {student['last_name']}")
-            print(f"Admission: {student['admission_number']}")
-            print(f"\nResults:")
+            self._say(f"\n TRANSCRIPT")
+            self._say(f"Name: {student['first_name']} {student['last_name']}")
+            self._say(f"Admission: {student['admission_number']}")
+            self._say(f"\nResults:")
             
-            for result in results:
-                print(f"  • Score: {result['score']} - Grade: {result['grade']}")
+            if self.verbose:
+                for result in results:
+                    self._say(f"  • Score: {result['score']} - Grade: {result['grade']}")
             
             return {"student": student, "results": results}
             
         except Exception as e:
-            print(f" Error getting transcript: {e}")
+            self._say(f" Error getting transcript: {e}")
             return None
 
-    def get_all_results(self):
-        """List all results with human-friendly references"""
+    def get_class_transcripts(self, class_id, exam_ids=None):
+        """Build transcripts for every student in a class with a fixed number of queries.
+
+        Students and results are each fetched once, exams and subjects come
+        from the reference cache (one $in query each on a miss), and
+        everything is joined in memory. exam_ids (ids or names) limits the
+        exams included; names not yet cached cost one more query to resolve.
+        Returns one {"student", "results", "average"} dict per student; each
+        result carries exam_name, exam_date, subject_name and subject_code.
+        """
+        from bson import ObjectId
         try:
-            results = list(self.db.results.find())
-            if results:
-                print(f"\n Total Results: {len(results)}")
-                for r in results:
-                    # try to resolve student admission, exam name, subject code
-                    try:
-                        st = self.db.students.find_one({"_id": r.get('student_id')})
-                        adm = st['admission_number'] if st else str(r.get('student_id'))
-                    except Exception:
-                        adm = str(r.get('student_id'))
-                    try:
-                        ex = self.db.exams.find_one({"_id": r.get('exam_id')})
-                        en = ex['name'] if ex else str(r.get('exam_id'))
-                    except Exception:
-                        en = str(r.get('exam_id'))
-                    try:
-                        sub = self.db.subjects.find_one({"_id": r.get('subject_id')})
-                        sc = sub['code'] if sub else str(r.get('subject_id'))
-                    except Exception:
-                        sc = str(r.get('subject_id'))
+            cls_obj_id = self.resolver.resolve("class", class_id)
+            if not cls_obj_id:
+                self._say(f"Class with identifier {class_id} not found")
+                return []
+            students = list(self.db.students.find({"class_id": cls_obj_id}).sort("admission_number", 1))
+            if not students:
+                self._say("No students found in this class")
+                return []
+
+            query = {"student_id": {"$in": [st["_id"] for st in students]}}
+            if exam_ids is not None:
+                if isinstance(exam_ids, (str, ObjectId)):
+                    exam_ids = [exam_ids]
+                query["exam_id"] = {"$in": list(self.resolver.resolve_many("exam", exam_ids).values())}
+            results = list(self.db.results.find(query))
+
+            exams = self.reference_cache.get_many("exam", {r["exam_id"] for r in results})
+            subjects = self.reference_cache.get_many("subject", {r["subject_id"] for r in results})
+
+            by_student = {}
+            for r in results:
+                exam = exams.get(r["exam_id"], {})
+                subject = subjects.get(r["subject_id"], {})
+                r["exam_name"] = exam.get("name", str(r["exam_id"]))
+                r["exam_date"] = exam.get("date")
+                r["subject_name"] = subject.get("name", str(r["subject_id"]))
+                r["subject_code"] = subject.get("code", str(r["subject_id"]))
+                by_student.setdefault(r["student_id"], []).append(r)
+
+            transcripts = []
+            for st in students:
+                rows = by_student.get(st["_id"], [])
+                rows.sort(key=lambda r: (r["exam_date"] or datetime.min, r["subject_code"]))
+                scores = [r["score"] for r in rows if r.get("score") is not None]
+                transcripts.append({
+                    "student": st,
+                    "results": rows,
+                    "average": sum(scores) / len(scores) if scores else None,
+                })
+
+            self._say(f"\n Class Transcripts: {len(transcripts)} students")
+            if self.verbose:
+                for t in transcripts:
+                    st = t["student"]
+                    avg = f"{t['average']:.2f}" if t["average"] is not None else "-"
+                    self._say(f"  • {st['first_name']} {st['last_name']} ({st['admission_number']}) | Results: {len(t['results'])} | Average: {avg}")
+            return transcripts
+        except Exception as e:
+            self._say(f" Error getting class transcripts: {e}")
+            return []
+
+    def iter_results(self, query=None, after=None, limit=None, batch_size=500, projection=None):
+        """Stream results with admission_number, exam_name and subject_code added.
 
-                    print(f"  • {r['_id']} | Student: {adm} | Exam: {en} | Subject: {sc} | Score: {r.get('score')} | Grade: {r.get('grade')}")
+        References are resolved per batch with one $in query per collection,
+        so the query count depends on the number of batches, not rows.
+        """
+        cursor = self._keyset_cursor(self.db.results, query, after, limit, batch_size, projection)
+        for page in _chunked(cursor, batch_size):
+            yield from self._add_references(page, [
+                ("student_id", "student", "admission_number"),
+                ("exam_id", "exam", "exam_name"),
+                ("subject_id", "subject", "subject_code"),
+            ])
+
+    def get_all_results(self, limit=None, after=None, projection=LIST_PROJECTIONS["results"]):
+        """List results with human-friendly references. Pass limit/after to page."""
+        try:
+            results = list(self.iter_results(after=after, limit=limit, projection=projection))
+            if results:
+                self._say(self._listing_header("Results", len(results), limit))
+                if self.verbose:
+                    for r in results:
+                        self._say(f"  • {r['_id']} | Student: {r['admission_number']} | Exam: {r['exam_name']} | Subject: {r['subject_code']} | Score: {r.get('score')} | Grade: {r.get('grade')}")
                 return results
             else:
-                print('No results found')
+                self._say('No results found')
                 return []
         except Exception as e:
-            print(f" Error listing results: {e}")
+            self._say(f" Error listing results: {e}")
+            return []
+
+    def exam_ranking(self, exam_id, class_id=None, rank_by="total"):
+        """Merit list for an exam, computed server-side in one pipeline.
+
+        Positions use standard competition ranking (ties share a position and
+        the next one is skipped). Each student's subjects carry a per-subject
+        position. rank_by is "total" or "mean". class_id limits the ranking to
+        one class; otherwise every student who sat the exam is ranked.
+        """
+        try:
+            eid_obj = self.resolver.resolve("exam", exam_id)
+            if not eid_obj:
+                self._say(f" Exam not found for identifier: {exam_id}")
+                return []
+            if rank_by not in ("total", "mean"):
+                self._say(f" Unknown ranking field: {rank_by}")
+                return []
+            match = {"exam_id": eid_obj}
+            if class_id:
+                cls_obj_id = self.resolver.resolve("class", class_id)
+                if not cls_obj_id:
+                    self._say(f"Class with identifier {class_id} not found")
+                    return []
+                match["student_id"] = {"$in": self.db.students.distinct("_id", {"class_id": cls_obj_id})}
+
+            ranking = list(self.db.results.aggregate([
+                {"$match": match},
+                {"$setWindowFields": {
+                    "partitionBy": "$subject_id",
+                    "sortBy": {"score": -1},
+                    "output": {"subject_position": {"$rank": {}}}
+                }},
+                {"$group": {
+                    "_id": "$student_id",
+                    "total": {"$sum": "$score"},
+                    "mean": {"$avg": "$score"},
+                    "subjects": {"$push": {
+                        "subject_id": "$subject_id",
+                        "score": "$score",
+                        "grade": "$grade",
+                        "position": "$subject_position"
+                    }}
+                }},
+                {"$setWindowFields": {
+                    "sortBy": {rank_by: -1},
+                    "output": {"position": {"$rank": {}}}
+                }},
+                {"$lookup": {
+                    "from": "students",
+                    "localField": "_id",
+                    "foreignField": "_id",
+                    "pipeline": [{"$project": LIST_PROJECTIONS["students"]}],
+                    "as": "student"
+                }},
+                {"$sort": {"position": 1, "_id": 1}}
+            ]))
+
+            codes = self.resolver.natural_keys(
+                "subject", (sub["subject_id"] for row in ranking for sub in row["subjects"]))
+            for row in ranking:
+                student = row.pop("student")[0] if row.get("student") else {}
+                row["student_id"] = row.pop("_id")
+                row["admission_number"] = student.get("admission_number", str(row["student_id"]))
+                row["name"] = f"{student.get('first_name')} {student.get('last_name')}"
+                for sub in row["subjects"]:
+                    sub["subject_code"] = codes.get(sub["subject_id"], str(sub["subject_id"]))
+                row["subjects"].sort(key=lambda sub: sub["subject_code"])
+
+            if ranking:
+                self._say(f"\n Merit List: {len(ranking)} students")
+                if self.verbose:
+                    for row in ranking:
+                        self._say(f"  {row['position']:>3}. {row['name']} ({row['admission_number']}) | Total: {row['total']} | Mean: {row['mean']:.2f}")
+            else:
+                self._say("No results found for this exam")
+            return ranking
+        except Exception as e:
+            self._say(f" Error ranking exam: {e}")
             return []
 
     def update_result(self, result_id, score=None, remarks=None):
         """Update a result record by ObjectId. Score will recompute grade."""
+        from bson import ObjectId
         try:
             try:
                 filter_q = {"_id": ObjectId(result_id)}
             except Exception:
-                print('Invalid result identifier')
+                self._say('Invalid result identifier')
                 return False
 
             update_data = {}
@@ -920,101 +1726,750 @@ class EduTrackManager:
                 try:
                     sc = float(score)
                 except Exception:
-                    print('Invalid score')
+                    self._say('Invalid score')
                     return False
                 update_data['score'] = sc
-                update_data['grade'] = self.calculate_grade(sc)
+                update_data['grade'] = self.grade_scale.grade(sc)
             if remarks is not None:
                 update_data['remarks'] = remarks
 
             if not update_data:
-                print('No updates provided')
+                self._say('No updates provided')
                 return False
 
-            result = self.db.results.update_one(filter_q, {'$set': update_data})
-            if result.modified_count > 0:
-                print(' Result updated successfully')
+            from pymongo import ReturnDocument
+            before = self.db.results.find_one_and_update(
+                filter_q, {'$set': update_data},
+                projection={"student_id": 1, "exam_id": 1, "subject_id": 1, "score": 1},
+                return_document=ReturnDocument.BEFORE)
+            if before is not None:
+                if 'score' in update_data and before.get("score") != update_data['score']:
+                    keys = (before["student_id"], before["exam_id"], before["subject_id"])
+                    self._apply_result_changes([(*keys, before.get("score"), -1),
+                                                (*keys, update_data['score'], 1)])
+                self._say(' Result updated successfully')
                 return True
             else:
-                print('No result found to update')
+                self._say('No result found to update')
                 return False
         except Exception as e:
-            print(f" Error updating result: {e}")
+            self._say(f" Error updating result: {e}")
             return False
 
     def delete_result(self, result_id):
         """Delete result by ObjectId"""
+        from bson import ObjectId
         try:
             try:
-                res = self.db.results.delete_many({"_id": ObjectId(result_id)})
+                filter_q = {"_id": ObjectId(result_id)}
             except Exception:
-                print('Invalid result identifier')
+                self._say('Invalid result identifier')
                 return False
 
-            if res.deleted_count > 0:
-                print(f' Result deleted successfully (removed {res.deleted_count})')
+            doc = self.db.results.find_one_and_delete(
+                filter_q, projection={"student_id": 1, "exam_id": 1, "subject_id": 1, "score": 1})
+            if doc is not None:
+                self._apply_result_changes([(doc["student_id"], doc["exam_id"], doc["subject_id"], doc.get("score"), -1)])
+                self._say(' Result deleted successfully (removed 1)')
                 return True
             else:
-                print('No result found to delete')
+                self._say('No result found to delete')
                 return False
         except Exception as e:
-            print(f" Error deleting result: {e}")
+            self._say(f" Error deleting result: {e}")
             return False
     
+    # Result statistics
+    #
+    # result_stats holds running count/sum/min/max of scores per student, per
+    # exam and per subject ({"scope": "student", "key": <ObjectId>, ...}).
+    # Every result write moves them in the same call; the mean is sum/count.
+    # Removing a score that was a scope's min or max recomputes that scope.
+    # rebuild_result_stats() (main.py --rebuild-summaries) recomputes all.
+
+    def get_result_stats(self, scope, identifier):
+        """Precomputed score stats for a student, exam or subject.
+
+        scope is "student", "exam" or "subject"; identifier an id or natural
+        key. Returns {"count", "sum", "min", "max", "mean"} or None.
+        """
+        try:
+            if scope not in RESULT_STAT_SCOPES:
+                self._say(f"Unknown stats scope: {scope}")
+                return None
+            key = self.resolver.resolve(scope, identifier)
+            if not key:
+                self._say(f"{scope.capitalize()} not found for identifier: {identifier}")
+                return None
+            doc = self.db.result_stats.find_one({"scope": scope, "key": key})
+            if not doc or not doc.get("count"):
+                self._say("No results found")
+                return None
+            stats = {field: doc.get(field) for field in ("count", "sum", "min", "max")}
+            stats["mean"] = stats["sum"] / stats["count"]
+            self._say(f"\n Result stats for {scope} {identifier}: {stats['count']} results, "
+                      f"mean {stats['mean']:.2f}, min {stats['min']}, max {stats['max']}")
+            return stats
+        except Exception as e:
+            self._say(f" Error getting result stats: {e}")
+            return None
+
+    def results_frame(self, filter=None, batch_size=5000):
+        """Columnar NumPy snapshot of results for analytics.
+
+        filter is a results query (e.g. {"exam_id": ...}). See
+        edutrack_analytics.ResultsFrame for group_stats/grade_distribution.
+        Raises RuntimeError when NumPy is not installed.
+        """
+        from edutrack_analytics import results_frame
+        return results_frame(self, filter, batch_size)
+
+    @staticmethod
+    def _result_stat_requests(changes):
+        """Upserts for result_stats, plus the scopes whose min/max may be stale.
+
+        changes holds (student_id, exam_id, subject_id, score, +1 or -1)
+        entries. Adds and removals of the same score in a scope cancel out
+        first, so re-entering an unchanged mark leaves its scopes alone.
+        Returns (requests, {(scope, key): removed scores}).
+        """
+        from pymongo import UpdateOne
+        net = {}  # (scope, key) -> {score: net count}
+        for sid, eid, subid, score, sign in changes:
+            if isinstance(score, bool) or not isinstance(score, (int, float)):
+                continue
+            for scope, key in (("student", sid), ("exam", eid), ("subject", subid)):
+                scores = net.setdefault((scope, key), {})
+                scores[score] = scores.get(score, 0) + sign
+        now = datetime.utcnow()
+        requests, removed = [], {}
+        for (scope, key), scores in net.items():
+            count = sum(scores.values())
+            total = sum(score * n for score, n in scores.items())
+            added = [score for score, n in scores.items() if n > 0]
+            lost = {score for score, n in scores.items() if n < 0}
+            if lost:
+                removed[(scope, key)] = lost
+            update = {"$set": {"updated_at": now}}
+            inc = {field: value for field, value in (("count", count), ("sum", total)) if value}
+            if inc:
+                update["$inc"] = inc
+            if added:
+                update["$min"] = {"min": min(added)}
+                update["$max"] = {"max": max(added)}
+            if inc or added:
+                requests.append(UpdateOne({"scope": scope, "key": key}, update, upsert=True))
+        return requests, removed
+
+    def _apply_result_changes(self, changes):
+        """Move result_stats by the given changes; recompute scopes that lost a min/max."""
+        try:
+            requests, removed = self._result_stat_requests(changes)
+            if requests:
+                self.db.result_stats.bulk_write(requests, ordered=False)
+            if removed:
+                stale = self.db.result_stats.find(
+                    {"$or": [{"scope": scope, "key": key, "$or": [{"min": {"$in": list(scores)}},
+                                                                   {"max": {"$in": list(scores)}},
+                                                                   {"count": {"$lte": 0}}]}
+                             for (scope, key), scores in removed.items()]},
+                    {"scope": 1, "key": 1})
+                for doc in list(stale):
+                    self._recompute_result_stats(doc["scope"], doc["key"])
+        except Exception as e:
+            self._say(f" Result stats not updated ({e}); run rebuild_result_stats()")
+
+    @staticmethod
+    def _result_stats_pipeline(scope, match=None):
+        """Aggregation producing result_stats documents for one scope."""
+        field = RESULT_STAT_SCOPES[scope]
+        return [
+            {"$match": match or {}},
+            {"$group": {"_id": f"${field}", "count": {"$sum": 1}, "sum": {"$sum": "$score"},
+                        "min": {"$min": "$score"}, "max": {"$max": "$score"}}},
+            {"$project": {"_id": 0, "scope": {"$literal": scope}, "key": "$_id",
+                          "count": 1, "sum": 1, "min": 1, "max": 1,
+                          "updated_at": {"$literal": datetime.utcnow()}}},
+        ]
+
+    def _recompute_result_stats(self, scope, key):
+        """Recompute one scope from its results (or drop it when none are left)."""
+        rows = list(self.db.results.aggregate(
+            self._result_stats_pipeline(scope, {RESULT_STAT_SCOPES[scope]: key})))
+        if rows:
+            self.db.result_stats.replace_one({"scope": scope, "key": key}, rows[0], upsert=True)
+        else:
+            self.db.result_stats.delete_one({"scope": scope, "key": key})
+
+    def rebuild_result_stats(self):
+        """Recompute result_stats from scratch; returns the number of documents."""
+        try:
+            self.db.result_stats.delete_many({})
+            count = 0
+            for scope in RESULT_STAT_SCOPES:
+                for chunk in _chunked(self.db.results.aggregate(self._result_stats_pipeline(scope)), 1000):
+                    self.db.result_stats.insert_many(chunk, ordered=False)
+                    count += len(chunk)
+            self._say(f" Result stats rebuilt ({count} students, exams and subjects)")
+            return count
+        except Exception as e:
+            self._say(f" Error rebuilding result stats: {e}")
+            return None
+
+    # Bulk operations
+    #
+    # Each *_bulk method accepts an iterable of dicts whose keys match the
+    # arguments of the single-record method (e.g. add_students_bulk takes
+    # records shaped like add_student's keyword arguments). Records are
+    # processed in chunks: identifiers are resolved once per chunk and the
+    # chunk is written with a single unordered insert_many. The return value
+    # is one report per input row, in input order:
+    #   {"row": 0, "ok": True, "id": "<ObjectId>"}
+    #   {"row": 1, "ok": False, "error": "<reason>"}
+
+    def add_teachers_bulk(self, records, chunk_size=1000):
+        """Create many teachers in unordered batches."""
+        def build(chunk):
+            outcomes = []
+            for rec in chunk:
+                missing = self._missing_fields(rec, ("employee_number", "first_name", "last_name"))
+                if missing:
+                    outcomes.append(missing)
+                    continue
+                outcomes.append({
+                    "employee_number": rec["employee_number"],
+                    "first_name": rec["first_name"],
+                    "last_name": rec["last_name"],
+                    "phone": rec.get("phone"),
+                    "email": rec.get("email"),
+                    "department": rec.get("department"),
+                    "created_at": datetime.utcnow()
+                })
+            return outcomes
+        return self._bulk_insert(self.db.teachers, records, build, chunk_size, "Teachers",
+                                 on_written=lambda docs: self.reference_cache.invalidate_listing("teacher"))
+
+    def add_classes_bulk(self, records, chunk_size=1000):
+        """Create many classes. Class teacher may be an id or employee number."""
+        def build(chunk):
+            teachers = self.resolver.resolve_many("teacher", [r.get("class_teacher_id") for r in chunk])
+            outcomes = []
+            for rec in chunk:
+                missing = self._missing_fields(rec, ("class_name", "form"))
+                if missing:
+                    outcomes.append(missing)
+                    continue
+                tid = rec.get("class_teacher_id")
+                if tid and tid not in teachers:
+                    outcomes.append(f"Teacher not found for identifier: {tid}")
+                    continue
+                outcomes.append({
+                    "name": rec["class_name"],
+                    "form": rec["form"],
+                    "class_teacher_id": teachers.get(tid) if tid else None,
+                    "created_at": datetime.utcnow()
+                })
+            return outcomes
+        return self._bulk_insert(self.db.classes, records, build, chunk_size, "Classes",
+                                 on_written=lambda docs: self.reference_cache.invalidate_listing("class"))
+
+    def add_students_bulk(self, records, chunk_size=1000):
+        """Create many students. Class may be an id or class name."""
+        def build(chunk):
+            classes = self.resolver.resolve_many("class", [r.get("class_id") for r in chunk])
+            outcomes = []
+            for rec in chunk:
+                missing = self._missing_fields(rec, ("admission_number", "first_name", "last_name"))
+                if missing:
+                    outcomes.append(missing)
+                    continue
+                cid = rec.get("class_id")
+                if cid and cid not in classes:
+                    outcomes.append(f"Class with identifier {cid} not found")
+                    continue
+                outcomes.append({
+                    "admission_number": rec["admission_number"],
+                    "first_name": rec["first_name"],
+                    "last_name": rec["last_name"],
+                    "gender": rec.get("gender"),
+                    "date_of_birth": self._as_datetime(rec.get("date_of_birth")),
+                    "class_id": classes.get(cid) if cid else None,
+                    "parent_phone": rec.get("parent_phone"),
+                    "created_at": datetime.utcnow()
+                })
+            return outcomes
+        return self._bulk_insert(self.db.students, records, build, chunk_size, "Students")
+
+    def add_subjects_bulk(self, records, chunk_size=1000):
+        """Create many subjects. Teacher may be an id or employee number."""
+        def build(chunk):
+            teachers = self.resolver.resolve_many("teacher", [r.get("teacher_id") for r in chunk])
+            outcomes = []
+            for rec in chunk:
+                missing = self._missing_fields(rec, ("name", "code"))
+                if missing:
+                    outcomes.append(missing)
+                    continue
+                tid = rec.get("teacher_id")
+                if tid and tid not in teachers:
+                    outcomes.append(f"Teacher not found for identifier: {tid}")
+                    continue
+                outcomes.append({
+                    "name": rec["name"],
+                    "code": rec["code"],
+                    "teacher_id": teachers.get(tid) if tid else None,
+                    "created_at": datetime.utcnow()
+                })
+            return outcomes
+        return self._bulk_insert(self.db.subjects, records, build, chunk_size, "Subjects",
+                                 on_written=lambda docs: self.reference_cache.invalidate_listing("subject"))
+
+    def add_exams_bulk(self, records, chunk_size=1000):
+        """Create many exams. Class may be an id or class name."""
+        def build(chunk):
+            classes = self.resolver.resolve_many("class", [r.get("class_id") for r in chunk])
+            outcomes = []
+            for rec in chunk:
+                missing = self._missing_fields(rec, ("name", "exam_date", "class_id"))
+                if missing:
+                    outcomes.append(missing)
+                    continue
+                if rec["class_id"] not in classes:
+                    outcomes.append(f"Class not found for identifier: {rec['class_id']}")
+                    continue
+                outcomes.append({
+                    "name": rec["name"],
+                    "date": self._as_datetime(rec["exam_date"]),
+                    "class_id": classes[rec["class_id"]],
+                    "created_at": datetime.utcnow()
+                })
+            return outcomes
+        return self._bulk_insert(self.db.exams, records, build, chunk_size, "Exams",
+                                 on_written=lambda docs: self.reference_cache.invalidate_listing("exam"))
+
+    def record_attendance_bulk(self, records, chunk_size=1000, upsert=False):
+        """Save many attendance records. Student may be an id or admission number.
+
+        With upsert=True each record upserts on (student_id, date) like
+        record_attendance, so existing marks are updated instead of
+        rejected by the unique index (see _bulk_upsert).
+        """
+        def build(chunk):
+            students = self.resolver.resolve_many("student", [r.get("student_id") for r in chunk])
+            return self._attendance_documents(chunk, students)
+
+        if upsert:
+            return self._bulk_upsert(
+                records, build, chunk_size, "Attendance", lambda d: (d["student_id"], d["date"]),
+                lambda latest: self._write_attendance_marks({k: d["status"] for k, d in latest.items()}))
+
+        def count(docs):
+            self._apply_summary_changes([(d["student_id"], d["date"], d["status"], 1) for d in docs])
+        return self._bulk_insert(self.db.attendance, records, build, chunk_size, "Attendance", on_written=count)
+
+    def record_results_bulk(self, records, chunk_size=1000, upsert=False):
+        """Save many results. Accepts admission numbers, exam names and subject codes.
+
+        With upsert=True each record upserts on (student_id, exam_id,
+        subject_id) like record_result, so existing marks are updated
+        instead of rejected by the unique index (see _bulk_upsert).
+        """
+        def build(chunk):
+            students = self.resolver.resolve_many("student", [r.get("student_id") for r in chunk])
+            exams = self.resolver.resolve_many("exam", [r.get("exam_id") for r in chunk])
+            subjects = self.resolver.resolve_many("subject", [r.get("subject_id") for r in chunk])
+            return self._result_documents(chunk, students, exams, subjects, self.grade_scale)
+
+        if upsert:
+            return self._bulk_upsert(
+                records, build, chunk_size, "Results", lambda d: (d["student_id"], d["exam_id"], d["subject_id"]),
+                lambda latest: self._write_result_marks({k: (d["score"], d.get("remarks")) for k, d in latest.items()}))
+
+        def count(docs):
+            self._apply_result_changes([(d["student_id"], d["exam_id"], d["subject_id"], d["score"], 1) for d in docs])
+        return self._bulk_insert(self.db.results, records, build, chunk_size, "Results", on_written=count)
+
+    def _bulk_insert(self, collection, records, build, chunk_size, label, on_written=None):
+        """Insert records chunk by chunk with unordered insert_many; report per row.
+
+        on_written, if given, is called with each chunk's inserted documents.
+        """
+        from pymongo.errors import BulkWriteError
+        reports = []
+        row = 0
+        for chunk in _chunked(records, chunk_size):
+            docs, positions = self._split_outcomes(self._build_chunk(build, chunk), row, reports)
+            if docs:
+                failed = {}
+                try:
+                    collection.insert_many(docs, ordered=False)
+                except BulkWriteError as e:
+                    failed = self._write_errors(e)
+                except Exception as e:
+                    failed = {i: str(e) for i in range(len(docs))}
+                self._insert_reports(docs, positions, failed, reports)
+                if on_written is not None:
+                    on_written([doc for i, doc in enumerate(docs) if i not in failed])
+            row += len(chunk)
+
+        reports.sort(key=lambda r: r["row"])
+        added = sum(1 for r in reports if r["ok"])
+        self._say(f" {label} bulk insert: {added} added, {len(reports) - added} failed")
+        return reports
+
+    def _bulk_upsert(self, records, build, chunk_size, label, key, write):
+        """Upsert records chunk by chunk through a *_marks writer; report per row.
+
+        key(doc) is a built document's unique key; within a chunk the last
+        record per key wins. write({key: doc}) returns (counts, {key index:
+        error}), as _write_attendance_marks and _write_result_marks do.
+        Reports carry no "id": upserted ids are not returned by the server.
+        """
+        reports = []
+        row = 0
+        for chunk in _chunked(records, chunk_size):
+            docs, positions = self._split_outcomes(self._build_chunk(build, chunk), row, reports)
+            if docs:
+                latest = self._latest_by_key(docs, key)
+                try:
+                    _, failed = write(latest)
+                except Exception as e:
+                    failed = {i: str(e) for i in range(len(latest))}
+                self._upsert_reports(docs, positions, key, list(latest), failed, reports)
+            row += len(chunk)
+
+        reports.sort(key=lambda r: r["row"])
+        saved = sum(1 for r in reports if r["ok"])
+        self._say(f" {label} bulk upsert: {saved} saved, {len(reports) - saved} failed")
+        return reports
+
+    # Bulk helpers, shared with AsyncEduTrackManager
+
+    @staticmethod
+    def _marks_query(fields, keys):
+        """Query for the stored documents behind mark keys (tuples of fields' values)."""
+        return {field: {"$in": list({key[i] for key in keys})} for i, field in enumerate(fields)}
+
+    @staticmethod
+    def _upsert_counts(total, result=None, error=None):
+        """({"recorded", "updated", "unchanged", "failed"}, {index: error}) for a bulk
+        upsert of total marks, from its BulkWriteResult or BulkWriteError."""
+        counts = {"recorded": 0, "updated": 0, "unchanged": 0, "failed": 0}
+        failed = {}
+        if result is not None:
+            counts["recorded"], counts["updated"] = result.upserted_count, result.modified_count
+        elif error is not None:
+            failed = EduTrackManager._write_errors(error)
+            counts["recorded"], counts["updated"] = error.details.get("nUpserted", 0), error.details.get("nModified", 0)
+        counts["failed"] = len(failed)
+        counts["unchanged"] = total - counts["recorded"] - counts["updated"] - counts["failed"]
+        return counts, failed
+
+    @staticmethod
+    def _mark_changes(marks, before, failed, value=None):
+        """Summary/stats changes for written marks: +1 for the new value, -1 for
+        the one it replaced. value(mark) picks the status or score; marks that
+        failed or did not change are skipped."""
+        changes = []
+        for i, (key, mark) in enumerate(marks.items()):
+            new = value(mark) if value else mark
+            if i in failed or (key in before and before[key] == new):
+                continue
+            changes.append((*key, new, 1))
+            if key in before:
+                changes.append((*key, before[key], -1))
+        return changes
+
+    @staticmethod
+    def _upsert_reports(docs, positions, key, keys, failed, reports):
+        """Append one report per upserted document; failed maps key index -> error."""
+        errors = {keys[i]: message for i, message in failed.items()}
+        for doc, position in zip(docs, positions):
+            error = errors.get(key(doc))
+            if error is None:
+                reports.append({"row": position, "ok": True})
+            else:
+                reports.append({"row": position, "ok": False, "error": error})
+
+    @staticmethod
+    def _latest_by_key(docs, key):
+        """{key: doc} keeping the last document per key."""
+        latest = {}
+        for doc in docs:
+            latest[key(doc)] = doc
+        return latest
+
+    @staticmethod
+    def _build_chunk(build, chunk):
+        """build(chunk), or the error as every row's outcome if it raises.
+
+        build resolves identifiers, so a driver error here fails only this
+        chunk; reports for chunks already written are kept.
+        """
+        try:
+            return build(chunk)
+        except Exception as e:
+            return [f"Error resolving identifiers: {e}"] * len(chunk)
+
+    @staticmethod
+    def _attendance_documents(chunk, students):
+        """Attendance documents for a chunk of records, or an error per bad row.
+
+        students maps the records' student identifiers to ObjectIds.
+        """
+        outcomes = []
+        for rec in chunk:
+            missing = EduTrackManager._missing_fields(rec, ("student_id", "attendance_date", "status"))
+            if missing:
+                outcomes.append(missing)
+                continue
+            if rec["student_id"] not in students:
+                outcomes.append(f"Student not found for identifier: {rec['student_id']}")
+                continue
+            outcomes.append({
+                "student_id": students[rec["student_id"]],
+                "date": EduTrackManager._as_datetime(rec["attendance_date"]),
+                "status": rec["status"],
+                "created_at": datetime.utcnow()
+            })
+        return outcomes
+
+    @staticmethod
+    def _result_documents(chunk, students, exams, subjects, grade_scale):
+        """Graded result documents for a chunk of records, or an error per bad row.
+
+        students/exams/subjects map the records' identifiers to ObjectIds;
+        the chunk is graded in one grade_many call.
+        """
+        outcomes = []
+        for rec in chunk:
+            missing = EduTrackManager._missing_fields(rec, ("student_id", "exam_id", "subject_id", "score"))
+            if missing:
+                outcomes.append(missing)
+                continue
+            score = rec["score"]
+            if isinstance(score, bool) or not isinstance(score, (int, float)):
+                outcomes.append(f"Invalid score: {score!r}")
+                continue
+            if rec["student_id"] not in students:
+                outcomes.append(f"Student not found for identifier: {rec['student_id']}")
+                continue
+            if rec["exam_id"] not in exams:
+                outcomes.append(f"Exam not found for identifier: {rec['exam_id']}")
+                continue
+            if rec["subject_id"] not in subjects:
+                outcomes.append(f"Subject not found for identifier: {rec['subject_id']}")
+                continue
+            outcomes.append({
+                "student_id": students[rec["student_id"]],
+                "exam_id": exams[rec["exam_id"]],
+                "subject_id": subjects[rec["subject_id"]],
+                "score": score,
+                "remarks": rec.get("remarks"),
+                "created_at": datetime.utcnow()
+            })
+        docs = [o for o in outcomes if isinstance(o, dict)]
+        for doc, grade in zip(docs, grade_scale.grade_many([d["score"] for d in docs])):
+            doc["grade"] = grade
+        return outcomes
+
+    @staticmethod
+    def _split_outcomes(outcomes, row, reports):
+        """Separate built documents from row errors (appended to reports).
+
+        Returns (docs, positions) where positions are the docs' input rows.
+        """
+        docs, positions = [], []
+        for offset, outcome in enumerate(outcomes):
+            if isinstance(outcome, dict):
+                docs.append(outcome)
+                positions.append(row + offset)
+            else:
+                reports.append({"row": row + offset, "ok": False, "error": outcome})
+        return docs, positions
+
+    @staticmethod
+    def _write_errors(error):
+        """Map write index -> message from a BulkWriteError.
+
+        Unordered writes keep going, so only the listed indexes failed.
+        """
+        return {err["index"]: err.get("errmsg", "write error")
+                for err in error.details.get("writeErrors", [])}
+
+    @staticmethod
+    def _insert_reports(docs, positions, failed, reports):
+        """Append one report per written document to reports."""
+        for i, doc in enumerate(docs):
+            if i in failed:
+                reports.append({"row": positions[i], "ok": False, "error": failed[i]})
+            else:
+                reports.append({"row": positions[i], "ok": True, "id": str(doc["_id"])})
+
+    @staticmethod
+    def _missing_fields(record, required):
+        """Return an error message naming missing required fields, or None."""
+        missing = [f for f in required if record.get(f) in (None, "")]
+        if missing:
+            return f"Missing required field(s): {', '.join(missing)}"
+        return None
+
     # Helper functions
     
+    @staticmethod
+    def _keyset_cursor(collection, query=None, after=None, limit=None, batch_size=500, projection=None):
+        """Cursor over a collection in _id order, resuming after an _id token.
+
+        Keyset pagination: the next page starts after the last _id of the
+        previous one (`after=str(page[-1]['_id'])`), so deep pages cost the
+        same as the first and nothing is skipped server-side.
+        """
+        from bson import ObjectId
+        query = dict(query or {})
+        if after:
+            query["_id"] = {"$gt": ObjectId(after)}
+        cursor = collection.find(query, projection).sort("_id", 1).batch_size(batch_size)
+        if limit:
+            cursor = cursor.limit(limit)
+        return cursor
+
+    @staticmethod
+    def _listing_header(label, count, limit=None):
+        """Header line for get_all_* output, marking paged listings."""
+        if limit:
+            return f"\n {label} (page): {count}"
+        return f"\n Total {label}: {count}"
+
+    def _add_references(self, docs, references):
+        """Add natural keys for referenced ids to a page of documents.
+
+        references is a list of (id_field, kind, output_field); each kind costs
+        at most one $in query (none for reference data already cached).
+        Unknown ids fall back to their string form.
+        """
+        for id_field, kind, out_field in references:
+            ids = [d.get(id_field) for d in docs]
+            if kind in REFERENCE_COLLECTIONS:
+                field = NATURAL_KEYS[kind][1]
+                keys = {oid: doc.get(field) for oid, doc in self.reference_cache.get_many(kind, ids).items()}
+            else:
+                keys = self.resolver.natural_keys(kind, ids)
+            for d in docs:
+                ref = d.get(id_field)
+                d[out_field] = keys.get(ref, str(ref))
+        return docs
+
+    @staticmethod
+    def _attendance_group(group_id):
+        """$group stage counting total/present/absent/late attendance records."""
+        return {"$group": {
+            "_id": group_id,
+            "total": {"$sum": 1},
+            "present": {"$sum": {"$cond": [{"$eq": ["$status", "Present"]}, 1, 0]}},
+            "absent": {"$sum": {"$cond": [{"$eq": ["$status", "Absent"]}, 1, 0]}},
+            "late": {"$sum": {"$cond": [{"$eq": ["$status", "Late"]}, 1, 0]}}
+        }}
+
+    @staticmethod
+    def _attendance_row(counts):
+        """Counts from _attendance_group plus the present percentage."""
+        row = {k: counts.get(k, 0) for k in ("total", "present", "absent", "late")}
+        row["percentage"] = (row["present"] / row["total"]) * 100 if row["total"] else 0.0
+        return row
+
+    @classmethod
+    def _date_range(cls, date_from=None, date_to=None, field="date"):
+        """Filter for an inclusive date range; empty when no bounds are given."""
+        bounds = {}
+        if date_from is not None:
+            bounds["$gte"] = cls._as_datetime(date_from)
+        if date_to is not None:
+            bounds["$lte"] = cls._as_datetime(date_to)
+        return {field: bounds} if bounds else {}
+
+    @staticmethod
+    def _as_datetime(value):
+        """Convert a date to a datetime (BSON cannot encode bare dates)."""
+        if isinstance(value, date) and not isinstance(value, datetime):
+            return datetime.combine(value, datetime.min.time())
+        return value
+
     @staticmethod
     def calculate_grade(score):
-        """Calculate grade from score"""
-        if score >= 90:
-            return "A"
-        elif score >= 80:
-            return "B"
-        elif score >= 70:
-            return "C"
-        elif score >= 60:
-            return "D"
-        else:
-            return "F"
+        """Calculate grade from score on the default scale"""
+        return DEFAULT_GRADE_SCALE.grade(score)
+
+    def regrade_all(self, scale=None):
+        """Recompute every stored grade server-side with one update_many.
+
+        scale, when given, also becomes this manager's grade_scale.
+        """
+        try:
+            if scale is not None:
+                self.grade_scale = scale
+            result = self.db.results.update_many(
+                {}, [{"$set": {"grade": self.grade_scale.switch_expression("$score")}}])
+            self._say(f" Regraded results (changed {result.modified_count})")
+            return result.modified_count
+        except Exception as e:
+            self._say(f" Error regrading results: {e}")
+            return None
     
-    def get_database_stats(self):
-        """Get database statistics"""
+    def get_database_stats(self, mode="fast", max_age=None):
+        """Get document counts for every collection.
+
+        mode="fast" reads collection metadata (estimated_document_count);
+        mode="exact" runs count_documents on all collections concurrently,
+        for audits. With max_age (seconds), a cached result of the same mode
+        that is younger than max_age is returned without querying.
+        """
         try:
-            students_count = self.db.students.count_documents({})
-            teachers_count = self.db.teachers.count_documents({})
-            classes_count = self.db.classes.count_documents({})
-            subjects_count = self.db.subjects.count_documents({})
-            attendance_count = self.db.attendance.count_documents({})
-            exams_count = self.db.exams.count_documents({})
-            results_count = self.db.results.count_documents({})
+            cached = self._stats_cache.get(mode)
+            if max_age is not None and cached and time.monotonic() - cached[0] < max_age:
+                stats = cached[1]
+            else:
+                if mode == "exact":
+                    from concurrent.futures import ThreadPoolExecutor
+                    with ThreadPoolExecutor(max_workers=len(STATS_COLLECTIONS)) as pool:
+                        counts = pool.map(lambda c: self.db[c].count_documents({}), STATS_COLLECTIONS)
+                elif mode == "fast":
+                    counts = [self.db[c].estimated_document_count() for c in STATS_COLLECTIONS]
+                else:
+                    self._say(f" Unknown stats mode: {mode}")
+                    return None
+                stats = dict(zip(STATS_COLLECTIONS, counts))
+                self._stats_cache[mode] = (time.monotonic(), stats)
             
-            print(f"\n DATABASE STATISTICS")
-            print(f"  Students: {students_count}")
-            print(f"  Teachers: {teachers_count}")
-            print(f"  Classes: {classes_count}")
-            print(f"  Subjects: {subjects_count}")
-            print(f"  Attendance Records: {attendance_count}")
-            print(f"  Exams: {exams_count}")
-            print(f"  Results: {results_count}")
+            self._say(f"\n DATABASE STATISTICS")
+            self._say(f"  Students: {stats['students']}")
+            self._say(f"  Teachers: {stats['teachers']}")
+            self._say(f"  Classes: {stats['classes']}")
+            self._say(f"  Subjects: {stats['subjects']}")
+            self._say(f"  Attendance Records: {stats['attendance']}")
+            self._say(f"  Exams: {stats['exams']}")
+            self._say(f"  Results: {stats['results']}")
             
-            return {
-                "students": students_count,
-                "teachers": teachers_count,
-                "classes": classes_count,
-                "subjects": subjects_count,
-                "attendance": attendance_count,
-                "exams": exams_count,
-                "results": results_count
-            }
+            return dict(stats)
         except Exception as e:
-            print(f" Error getting stats: {e}")
+            self._say(f" Error getting stats: {e}")
             return None
     
     def close_connection(self):
-        """Close MongoDB connection"""
-        if self.client:
-            self.client.close()
-            print("\n MongoDB connection closed")
+        """Release this manager's MongoDB connection.
+
+        The shared client stays open for other managers and is closed at
+        interpreter exit (or explicitly with edutrack_connection.close_client()).
+        A running attendance buffer is flushed and stopped first.
+        """
+        if self._attendance_buffer is not None:
+            self._attendance_buffer.close()
+            self._attendance_buffer = None
+        if self._client is not None:
+            self._client = None
+            self._db = None
+            self._resolver = None
+            self._reference_cache = None
+            self._say("\n MongoDB connection closed")
 
 
 # MAIN EXAMPLE 
@@ -2,7 +2,12 @@
 """Simple interactive CLI for EduTrack manager."""
 from edutrack_manager import EduTrackManager
 from datetime import datetime
-from bson import ObjectId
+import threading
+
+# rows shown per page by the List options
+PAGE_SIZE = 20
+# seconds the Stats dashboard may reuse its last counts
+STATS_MAX_AGE = 30
 
 
 def prompt(msg, required=True):
@@ -29,6 +34,21 @@ def is_back_choice(val):
 class CLI:
     def __init__(self):
         self.mgr = EduTrackManager()
+        # Load teachers, classes, subjects and exams in the background so the
+        # menu appears immediately and the first lookups are cache hits.
+        threading.Thread(target=self.mgr.warm_reference_cache, daemon=True).start()
+
+    def show_pages(self, fetch, page_size=PAGE_SIZE):
+        """Show a get_all_* listing one page at a time."""
+        after = None
+        while True:
+            page = fetch(limit=page_size, after=after)
+            if len(page) < page_size:
+                break
+            more = prompt('Enter for next page, b to stop: ', required=False)
+            if more is None or more:
+                break
+            after = str(page[-1]['_id'])
 
     def teachers(self):
         while True:
@@ -43,7 +63,7 @@ class CLI:
                 dept = prompt('Department: ')
                 self.mgr.add_teacher(emp, fn, ln, phone, email, dept)
             elif c == '2':
-                self.mgr.get_all_teachers()
+                self.show_pages(self.mgr.get_all_teachers)
             elif c == '3':
                 tid = prompt('Teacher ID or employee number: ')
                 self.mgr.get_teacher(tid)
@@ -66,7 +86,7 @@ class CLI:
                     ok = self.mgr.delete_teacher(tid)
                     if ok:
                         print('\nUpdated teachers list:')
-                        self.mgr.get_all_teachers()
+                        self.show_pages(self.mgr.get_all_teachers)
             # accept explicit back keys
             if c in ('6',) or is_back_choice(c):
                 break
@@ -82,7 +102,7 @@ class CLI:
                 tid = prompt('Class teacher ID (optional): ', required=False)
                 self.mgr.add_class(name, form, tid if tid else None)
             elif c == '2':
-                self.mgr.get_all_classes()
+                self.show_pages(self.mgr.get_all_classes)
             elif c == '3':
                 cid = prompt('Class ID or class name: ')
                 self.mgr.get_class(cid)
@@ -90,6 +110,7 @@ class CLI:
                 break
 
     def students(self):
+        from bson import ObjectId
         while True:
             print('\nStudents: 1)Add 2)List 3)Get 4)Update 5)Delete 6)By class 7)Back (or b)')
             c = prompt('Choice: ')
@@ -108,7 +129,7 @@ class CLI:
                 parent = prompt('Parent phone (optional): ', required=False)
                 self.mgr.add_student(adm, fn, ln, gender, dob, class_id, parent if parent else None)
             elif c == '2':
-                self.mgr.get_all_students()
+                self.show_pages(self.mgr.get_all_students)
             elif c == '3':
                 sid = prompt('Student ID or admission number: ')
                 self.mgr.get_student(sid)
@@ -140,7 +161,7 @@ class CLI:
                     ok = self.mgr.delete_student(sid)
                     if ok:
                         print('\nUpdated students list:')
-                        self.mgr.get_all_students()
+                        self.show_pages(self.mgr.get_all_students)
             elif c == '6':
                 cid = prompt('Class ID or class name: ')
                 self.mgr.get_students_by_class(cid)
@@ -148,6 +169,7 @@ class CLI:
                 break
 
     def subjects(self):
+        from bson import ObjectId
         while True:
             print('\nSubjects: 1)Add 2)List 3)Get 4)Update 5)Delete 6)Back (or b)')
             c = prompt('Choice: ')
@@ -165,7 +187,7 @@ class CLI:
                     tid_val = None
                 self.mgr.add_subject(name, code, tid_val)
             elif c == '2':
-                self.mgr.get_all_subjects()
+                self.show_pages(self.mgr.get_all_subjects)
             elif c == '3':
                 sid = prompt('Subject ID or subject code: ')
                 self.mgr.get_subject(sid)
@@ -190,7 +212,7 @@ class CLI:
                     ok = self.mgr.update_subject(sid, **update)
                     if ok:
                         print('\nUpdated subjects list:')
-                        self.mgr.get_all_subjects()
+                        self.show_pages(self.mgr.get_all_subjects)
                 else:
                     print('No updates provided')
             elif c == '5':
@@ -199,13 +221,14 @@ class CLI:
                     ok = self.mgr.delete_subject(sid)
                     if ok:
                         print('\nUpdated subjects list:')
-                        self.mgr.get_all_subjects()
+                        self.show_pages(self.mgr.get_all_subjects)
             if c in ('6',) or is_back_choice(c):
                 break
 
     def attendance(self):
         while True:
-            print('\nAttendance: 1)Record 2)List all 3)View student 4)Summary 5)Update 6)Delete 7)Back (or b)')
+            print('\nAttendance: 1)Record 2)List all 3)View student 4)Summary 5)Update 6)Delete')
+            print('            7)Class summary 8)School summary 9)Class register 10)Back (or b)')
             c = prompt('Choice: ')
             if c == '1':
                 sid = prompt('Student ID or admission number: ')
@@ -218,13 +241,14 @@ class CLI:
                     continue
                 self.mgr.record_attendance(sid, date_obj, status)
             elif c == '2':
-                self.mgr.get_all_attendance()
+                self.show_pages(self.mgr.get_all_attendance)
             elif c == '3':
                 sid = prompt('Student ID or admission number: ')
                 self.mgr.get_student_attendance(sid)
             elif c == '4':
                 sid = prompt('Student ID or admission number: ')
-                self.mgr.get_attendance_summary(sid)
+                term = prompt('Term, e.g. 2024-T1 (blank for all): ', required=False)
+                self.mgr.get_attendance_summary(sid, term if term else None)
             elif c == '5':
                 aid = prompt('Attendance ID or composite (admission|YYYY-MM-DD): ')
                 print('leave blank to skip')
@@ -240,15 +264,51 @@ class CLI:
                 ok = self.mgr.update_attendance(aid, date=date_val, status=status if status else None)
                 if ok:
                     print('\nUpdated attendance list:')
-                    self.mgr.get_all_attendance()
+                    self.show_pages(self.mgr.get_all_attendance)
             elif c == '6':
                 aid = prompt('Attendance ID or composite (admission|YYYY-MM-DD): ')
                 if prompt('Confirm delete (yes/no): ').lower().startswith('y'):
                     ok = self.mgr.delete_attendance(aid)
                     if ok:
                         print('\nUpdated attendance list:')
-                        self.mgr.get_all_attendance()
-            if c in ('7',) or is_back_choice(c):
+                        self.show_pages(self.mgr.get_all_attendance)
+            elif c in ('7', '8'):
+                cid = prompt('Class ID or class name: ') if c == '7' else None
+                print('leave blank for no limit')
+                from_in = prompt('From (YYYY-MM-DD): ', required=False)
+                to_in = prompt('To (YYYY-MM-DD): ', required=False)
+                try:
+                    date_from = datetime.strptime(from_in, '%Y-%m-%d').date() if from_in else None
+                    date_to = datetime.strptime(to_in, '%Y-%m-%d').date() if to_in else None
+                except Exception:
+                    print('Invalid date')
+                    continue
+                if c == '7':
+                    self.mgr.get_class_attendance_summary(cid, date_from, date_to)
+                else:
+                    self.mgr.get_school_attendance_summary(date_from, date_to)
+            elif c == '9':
+                cid = prompt('Class ID or class name: ')
+                date_s = prompt('Date (YYYY-MM-DD): ')
+                try:
+                    date_obj = datetime.strptime(date_s, '%Y-%m-%d').date()
+                except Exception:
+                    print('Invalid date')
+                    continue
+                default = prompt('Status for everyone not listed (default Present): ', required=False) or 'Present'
+                print('Enter exceptions as "admission status" (e.g. ADM001 Absent), blank line to finish')
+                register = {}
+                while True:
+                    line = prompt('> ', required=False)
+                    if not line:
+                        break
+                    parts = line.split()
+                    if len(parts) != 2:
+                        print('Expected: admission status')
+                        continue
+                    register[parts[0]] = parts[1].capitalize()
+                self.mgr.record_class_attendance(cid, date_obj, register, default_status=default.capitalize())
+            if c in ('10',) or is_back_choice(c):
                 break
 
     def exams(self):
@@ -266,7 +326,7 @@ class CLI:
                     continue
                 self.mgr.add_exam(name, date_obj, class_id)
             elif c == '2':
-                self.mgr.get_all_exams()
+                self.show_pages(self.mgr.get_all_exams)
             elif c == '3':
                 eid = prompt('Exam ID or exam name: ')
                 self.mgr.get_exam(eid)
@@ -291,7 +351,7 @@ class CLI:
                     ok = self.mgr.update_exam(eid, **update)
                     if ok:
                         print('\nUpdated exams list:')
-                        self.mgr.get_all_exams()
+                        self.show_pages(self.mgr.get_all_exams)
                 else:
                     print('No updates provided')
             elif c == '5':
@@ -300,13 +360,15 @@ class CLI:
                     ok = self.mgr.delete_exam(eid)
                     if ok:
                         print('\nUpdated exams list:')
-                        self.mgr.get_all_exams()
+                        self.show_pages(self.mgr.get_all_exams)
             if c in ('8',) or is_back_choice(c):
                 break
 
     def results(self):
+        from bson import ObjectId
         while True:
-            print('\nResults: 1)Record 2)List all 3)Get result 4)Update 5)Delete 6)View student results 7)Transcript 8)Back (or b)')
+            print('\nResults: 1)Record 2)List all 3)Get result 4)Update 5)Delete 6)View student results 7)Transcript')
+            print('         8)Exam ranking 9)Mark sheet 10)Back (or b)')
             c = prompt('Choice: ')
             if c == '1':
                 sid = prompt('Student ID or admission number: ')
@@ -320,7 +382,7 @@ class CLI:
                 remarks = prompt('Remarks (optional): ', required=False)
                 self.mgr.record_result(sid, eid, subid, score, remarks if remarks else None)
             elif c == '2':
-                self.mgr.get_all_results()
+                self.show_pages(self.mgr.get_all_results)
             elif c == '3':
                 rid = prompt('Result ID: ')
                 try:
@@ -346,21 +408,41 @@ class CLI:
                 ok = self.mgr.update_result(rid, score=score_val, remarks=remarks if remarks else None)
                 if ok:
                     print('\nUpdated results list:')
-                    self.mgr.get_all_results()
+                    self.show_pages(self.mgr.get_all_results)
             elif c == '5':
                 rid = prompt('Result ID: ')
                 if prompt('Confirm delete (yes/no): ').lower().startswith('y'):
                     ok = self.mgr.delete_result(rid)
                     if ok:
                         print('\nUpdated results list:')
-                        self.mgr.get_all_results()
+                        self.show_pages(self.mgr.get_all_results)
             elif c == '6':
                 sid = prompt('Student ID or admission number: ')
                 self.mgr.get_student_results(sid)
             elif c == '7':
                 sid = prompt('Student ID or admission number: ')
                 self.mgr.get_student_transcript(sid)
-            if c in ('4',) or is_back_choice(c):
+            elif c == '8':
+                eid = prompt('Exam ID or exam name: ')
+                cid = prompt('Class ID or class name (optional): ', required=False)
+                self.mgr.exam_ranking(eid, cid if cid else None)
+            elif c == '9':
+                eid = prompt('Exam ID or exam name: ')
+                subid = prompt('Subject ID or subject code: ')
+                print('Enter marks as "admission score" (e.g. ADM001 78), blank line to finish')
+                sheet = {}
+                while True:
+                    line = prompt('> ', required=False)
+                    if not line:
+                        break
+                    parts = line.split()
+                    try:
+                        sheet[parts[0]] = float(parts[1]) if '.' in parts[1] else int(parts[1])
+                    except Exception:
+                        print('Expected: admission score')
+                if sheet:
+                    self.mgr.record_mark_sheet(eid, subid, sheet)
+            if c in ('10',) or is_back_choice(c):
                 break
 
     def run(self):
@@ -386,7 +468,10 @@ class CLI:
                 elif c == '7':
                     self.results()
                 elif c == '8':
-                    self.mgr.get_database_stats()
+                    self.mgr.get_database_stats(max_age=STATS_MAX_AGE)
+                    for name, c_stats in self.mgr.cache_stats().items():
+                        print(f"  {name.capitalize()} cache: {c_stats['size']} entries, "
+                              f"{c_stats['hits']} hits, {c_stats['misses']} misses ({c_stats['hit_rate']:.0%})")
                 elif c == '9' or c is None:
                     break
                 else:
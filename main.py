@@ -1,15 +1,61 @@
 import sys
 import os
+import time
 sys.path.insert(0, os.path.dirname(__file__))
 
-from interactive_cli import CLI
-from edutrack_manager import EduTrackManager
-
 
 def main():
- 
+    args = sys.argv[1:]
+
+    if args[:1] in (['import'], ['export']):
+        # Batch import/export skip the interactive menu:
+        #   main.py import <file> [--kind KIND]
+        #   main.py export <kind> [--format csv|jsonl] [--gzip]
+        # pymongo is already loaded by the commands, so this costs nothing extra
+        from pymongo.errors import PyMongoError
+        try:
+            if args[0] == 'import':
+                from edutrack_import import main as command
+            else:
+                from edutrack_export import main as command
+            sys.exit(command(args[1:]))
+        except (RuntimeError, ValueError, OSError, PyMongoError) as e:
+            print(f"\n[ERROR] {e}")
+            sys.exit(1)
+
+    profile = '--startup-profile' in args
+    started = time.perf_counter()
+
+    # Imported here so --startup-profile can time them. pymongo itself is
+    # only imported when the first query opens the connection.
+    from interactive_cli import CLI
+    from edutrack_manager import EduTrackManager
+    imported = time.perf_counter()
+
+    if '--init-indexes' in args:
+        print("Creating database indexes...")
+        try:
+            mgr = EduTrackManager()
+            try:
+                mgr.ensure_indexes()
+            finally:
+                mgr.close_connection()
+        except Exception as e:
+            print(f"Error creating indexes: {e}")
+
+    if '--rebuild-summaries' in args:
+        print("Rebuilding attendance summaries and result stats...")
+        try:
+            mgr = EduTrackManager()
+            try:
+                mgr.rebuild_attendance_summaries()
+                mgr.rebuild_result_stats()
+            finally:
+                mgr.close_connection()
+        except Exception as e:
+            print(f"Error rebuilding summaries: {e}")
 
-    if len(sys.argv) > 1 and sys.argv[1] == '--populate':
+    if '--populate' in args:
     
         print("Attempting to populate sample data...")
         try:
@@ -27,6 +73,13 @@ def main():
         print("Welcome to EduTrack - School Management System")
         
         cli = CLI()
+        if profile:
+            ready = time.perf_counter()
+            connect_s = cli.mgr.ping()
+            print("\n Startup profile:")
+            print(f"  Imports: {(imported - started) * 1000:.1f} ms")
+            print(f"  Menu ready: {(ready - started) * 1000:.1f} ms")
+            print(f"  First connect + ping: {connect_s * 1000:.1f} ms")
         cli.run()
     except RuntimeError as e:
         # Catch MongoDB connection errors
@@ -16,6 +16,9 @@ def populate_makini_school():
         
         print("POPULATING MAKINI SCHOOL DATABASE")
         
+        # Indexes first so natural keys are enforced from the first insert
+        manager.ensure_indexes()
+        
         
         #  ADD TEACHERS 
         print("\n Adding Teachers...")